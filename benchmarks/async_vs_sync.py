@@ -0,0 +1,137 @@
+"""
+Compare requests/sec of the async request path against the old sync one.
+
+Both apps serve `GET /users/{user_id}` from the same seeded Postgres
+container, so the only difference is `def` + `Session` (threadpool) versus
+`async def` + `AsyncSession` (event loop).
+
+    python -m benchmarks.async_vs_sync --requests 5000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from testcontainers.postgres import PostgresContainer
+
+from fastzero.app import app as async_app
+from fastzero.database import get_session
+from fastzero.models import User, table_registry
+from fastzero.schemas import UserPublic
+
+
+def build_sync_app(engine):
+    app = FastAPI()
+
+    def get_sync_session():
+        with Session(engine) as session:
+            yield session
+
+    @app.get('/users/{user_id}', response_model=UserPublic)
+    def read_user(user_id: int, session: Session = Depends(get_sync_session)):
+        user = session.scalar(select(User).where(User.id == user_id))
+        if not user:
+            raise HTTPException(status_code=404, detail='user not found')
+        return user
+
+    return app
+
+
+def seed(engine, users):
+    table_registry.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    'username': f'bench{i}',
+                    'email': f'bench{i}@test.com',
+                    'password': 'x',
+                }
+                for i in range(users)
+            ],
+        )
+
+
+async def drive(app, requests, concurrency, users):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(random.randint(1, users))
+
+    async def worker(client):
+        while not queue.empty():
+            user_id = queue.get_nowait()
+            start = time.perf_counter()
+            resp = await client.get(f'/users/{user_id}')
+            latencies.append(time.perf_counter() - start)
+            resp.raise_for_status()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url='http://b') as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+async def compare(url, args):
+    pool = {'pool_size': args.concurrency, 'max_overflow': 0}
+    sync_engine = create_engine(url, **pool)
+    seed(sync_engine, args.users)
+
+    results = {}
+    results['sync'] = await drive(
+        build_sync_app(sync_engine), args.requests, args.concurrency, args.users
+    )
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(url, **pool)
+
+    async def get_session_override():
+        async with AsyncSession(
+            async_engine, expire_on_commit=False
+        ) as session:
+            yield session
+
+    async_app.dependency_overrides[get_session] = get_session_override
+    results['async'] = await drive(
+        async_app, args.requests, args.concurrency, args.users
+    )
+    async_app.dependency_overrides.clear()
+    await async_engine.dispose()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    with PostgresContainer('postgres:16', driver='psycopg') as postgres:
+        results = asyncio.run(compare(postgres.get_connection_url(), args))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+Load test the todo API with a weighted mix of realistic requests.
+
+Seeds `--users` users with `--todos` todos each in a Postgres container,
+then runs `--concurrency` clients against the real ASGI app. Each client acts
+as its own user (clients share users only when there are more clients
+than users) and together they issue `--requests` requests, picking login,
+list, create, patch or delete by weight. Clients start with a token minted
+for their user, so a burst of logins at start does not overflow the
+hashing queue and leave clients without one.
+
+The report gives RPS and p50/p95/p99 latency per route. Save it with
+`--output` and pass an earlier report as `--baseline` to print the change
+per route next to it:
+
+    python -m benchmarks.load --output before.json
+    python -m benchmarks.load --baseline before.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from testcontainers.postgres import PostgresContainer
+
+from fastzero.app import app
+from fastzero.database import PrimarySession, get_session
+from fastzero.models import User, table_registry
+from fastzero.ratelimit import settings as rate_limit_settings
+from fastzero.security import (
+    access_token_claims,
+    create_access_token,
+    get_password_hash,
+)
+
+PASSWORD = 'bench-secret'
+
+MIX = {
+    'login': 5,
+    'list': 50,
+    'create': 20,
+    'patch': 15,
+    'delete': 10,
+}
+
+SEED_USERS = text("""
+    INSERT INTO users (username, email, password)
+    SELECT 'bench' || g, 'bench' || g || '@test.com', :password
+    FROM generate_series(1, :users) AS g
+""")
+
+SEED_TODOS = text("""
+    INSERT INTO todos (title, description, state, user_id)
+    SELECT 'todo ' || g, 'description ' || g, 'todo', u.id
+    FROM users AS u, generate_series(1, :todos) AS g
+""")
+
+
+async def seed(engine, users, todos):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            SEED_USERS,
+            {'users': users, 'password': get_password_hash(PASSWORD)},
+        )
+        await conn.execute(SEED_TODOS, {'todos': todos})
+        await conn.execute(text('ANALYZE'))
+
+
+async def mint_tokens(engine):
+    async with AsyncSession(engine) as session:
+        users = await session.scalars(select(User))
+        return {
+            user.username: create_access_token(access_token_claims(user))
+            for user in users
+        }
+
+
+def percentile(samples, p):
+    return samples[min(int(len(samples) * p), len(samples) - 1)]
+
+
+class Client:
+    def __init__(self, http, username, token, latencies, errors):
+        self.http = http
+        self.username = username
+        self.latencies = latencies
+        self.errors = errors
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.todo_ids = []
+
+    async def call(self, route, method, url, **kw):
+        start = time.perf_counter()
+        resp = await self.http.request(method, url, **kw)
+        self.latencies[route].append(time.perf_counter() - start)
+        if resp.is_error:
+            self.errors[route] += 1
+        return resp
+
+    async def login(self):
+        resp = await self.call(
+            'POST /auth/token',
+            'POST',
+            '/auth/token',
+            data={'username': self.username, 'password': PASSWORD},
+        )
+        if resp.is_success:
+            token = resp.json()['access_token']
+            self.headers = {'Authorization': f'Bearer {token}'}
+            self.todo_ids = []
+
+    async def list(self):
+        resp = await self.call(
+            'GET /todos/', 'GET', '/todos/?limit=20', headers=self.headers
+        )
+        if resp.is_success:
+            self.todo_ids = [todo['id'] for todo in resp.json()['todos']]
+
+    async def create(self):
+        resp = await self.call(
+            'POST /todos/',
+            'POST',
+            '/todos/',
+            headers=self.headers,
+            json={'title': 'load', 'description': 'load', 'state': 'todo'},
+        )
+        if resp.is_success:
+            self.todo_ids.append(resp.json()['id'])
+
+    async def patch(self):
+        if not self.todo_ids:
+            await self.list()
+            return
+        await self.call(
+            'PATCH /todos/{todo_id}',
+            'PATCH',
+            f'/todos/{random.choice(self.todo_ids)}',
+            headers=self.headers,
+            json={'state': 'doing'},
+        )
+
+    async def delete(self):
+        if not self.todo_ids:
+            await self.list()
+            return
+        todo_id = self.todo_ids.pop(random.randrange(len(self.todo_ids)))
+        await self.call(
+            'DELETE /todos/{todo_id}',
+            'DELETE',
+            f'/todos/{todo_id}',
+            headers=self.headers,
+        )
+
+
+async def drive(args, tokens):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    remaining = args.requests
+    actions, weights = zip(*MIX.items())
+
+    async def worker(http, n):
+        nonlocal remaining
+        username = f'bench{n % args.users + 1}'
+        client = Client(http, username, tokens[username], latencies, errors)
+        while remaining > 0:
+            remaining -= 1
+            action = random.choices(actions, weights)[0]
+            await getattr(client, action)()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://bench'
+    ) as http:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(http, n) for n in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - start
+
+    routes = {}
+    for route, samples in sorted(latencies.items()):
+        samples.sort()
+        routes[route] = {
+            'requests': len(samples),
+            'errors': errors[route],
+            'rps': round(len(samples) / elapsed, 1),
+            'p50_ms': round(percentile(samples, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+        }
+
+    total = sum(route['requests'] for route in routes.values())
+    return {
+        'config': {
+            'users': args.users,
+            'todos_per_user': args.todos,
+            'concurrency': args.concurrency,
+        },
+        'elapsed_s': round(elapsed, 2),
+        'rps': round(total / elapsed, 1),
+        'routes': routes,
+    }
+
+
+async def run(url, args):
+    engine = create_async_engine(
+        url, pool_size=args.concurrency, max_overflow=0
+    )
+    await seed(engine, args.users, args.todos)
+    tokens = await mint_tokens(engine)
+
+    async def get_session_override():
+        async with PrimarySession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    # every simulated client shares one address; keep the other limits
+    rate_limit_settings.RATE_LIMITS.pop('auth_token:ip', None)
+    try:
+        return await drive(args, tokens)
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def compare(report, baseline):
+    """Relative change of each route's numbers against `baseline`."""
+    changes = {}
+    for route, stats in report['routes'].items():
+        before = baseline['routes'].get(route)
+        if not before:
+            continue
+        changes[route] = {
+            key: f'{(stats[key] - before[key]) / before[key]:+.1%}'
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')
+            if before[key]
+        }
+
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--todos', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=10_000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path)
+    args = parser.parse_args()
+
+    with PostgresContainer('postgres:16', driver='psycopg') as postgres:
+        report = asyncio.run(run(postgres.get_connection_url(), args))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        report['change'] = compare(report, baseline)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure the per-request cost of `MetricsMiddleware`.
+
+A minimal ASGI app is called directly, with and without the middleware, so
+the difference is the middleware alone and not HTTP or routing. The run
+reports the mean overhead per request against the 50µs budget.
+
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from fastzero.metrics import MetricsMiddleware
+
+BUDGET_US = 50
+ROUTE = SimpleNamespace(path='/todos/{todo_id}')
+START = {'type': 'http.response.start', 'status': 200, 'headers': []}
+BODY = {'type': 'http.response.body', 'body': b'{}'}
+
+
+async def bare_app(scope, receive, send):
+    scope['route'] = ROUTE
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b''}
+
+
+async def send(message):
+    pass
+
+
+async def measure(app, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app({'type': 'http', 'method': 'GET'}, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def compare(requests, rounds):
+    wrapped = MetricsMiddleware(bare_app)
+    # warm up label children and the interpreter's caches
+    await measure(wrapped, 1000)
+
+    bare, instrumented = [], []
+    for _ in range(rounds):
+        bare.append(await measure(bare_app, requests))
+        instrumented.append(await measure(wrapped, requests))
+
+    overhead_us = (min(instrumented) - min(bare)) * 1e6
+    return {
+        'requests': requests,
+        'rounds': rounds,
+        'bare_us': round(min(bare) * 1e6, 2),
+        'instrumented_us': round(min(instrumented) * 1e6, 2),
+        'overhead_us': round(overhead_us, 2),
+        'budget_us': BUDGET_US,
+        'within_budget': overhead_us < BUDGET_US,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=50_000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    results = asyncio.run(compare(args.requests, args.rounds))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Latency of `GET /todos/` at increasing page depths, offset vs cursor.
+
+Seeds one user with `--todos` rows in a Postgres container and requests a
+page of `--limit` todos starting at each depth, in both pagination modes.
+
+    python -m benchmarks.pagination --todos 200000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from testcontainers.postgres import PostgresContainer
+
+from fastzero.app import app
+from fastzero.database import get_session
+from fastzero.list_cache import todo_list_cache
+from fastzero.models import Todo, User, table_registry
+from fastzero.pagination import encode_cursor
+from fastzero.security import access_token_claims, create_access_token
+from fastzero.singleflight import todo_list_flights, user_flights
+
+SEED_TODOS = text("""
+    INSERT INTO todos (title, description, state, user_id, created_at)
+    SELECT 'todo ' || g, 'description ' || g, 'todo', :user_id,
+           now() + g * interval '1 millisecond'
+    FROM generate_series(1, :todos) AS g
+""")
+
+
+async def seed(engine, todos):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        user_id = await conn.scalar(
+            insert(User)
+            .values(username='bench', email='bench@test.com', password='x')
+            .returning(User.id)
+        )
+        await conn.execute(SEED_TODOS, {'user_id': user_id, 'todos': todos})
+        await conn.execute(text('ANALYZE todos'))
+
+    return user_id
+
+
+async def cursor_at(engine, depth):
+    async with engine.connect() as conn:
+        row = (
+            await conn.execute(
+                select(Todo.created_at, Todo.id)
+                .order_by(Todo.created_at, Todo.id)
+                .offset(depth - 1)
+                .limit(1)
+            )
+        ).one()
+
+    return encode_cursor(list(row))
+
+
+async def timed(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resp = await client.get(url)
+        samples.append(time.perf_counter() - start)
+        resp.raise_for_status()
+
+    return round(statistics.median(samples) * 1000, 2)
+
+
+async def run(url, args):
+    engine = create_async_engine(url)
+    user_id = await seed(engine, args.todos)
+
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    # every sample repeats the same URL: keep it from being served by
+    # the list cache or a render shared from the previous sample
+    todo_list_cache.ttl = 0
+    todo_list_flights.max_age = user_flights.max_age = 0
+
+    async with AsyncSession(engine) as session:
+        user = await session.get(User, user_id)
+        token = create_access_token(access_token_claims(user))
+
+    depths = [d for d in (1, 1_000, 10_000, 50_000, 100_000) if d < args.todos]
+    depths.append(args.todos - args.limit)
+    results = []
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url='http://bench',
+        headers={'Authorization': f'Bearer {token}'},
+    ) as client:
+        for depth in depths:
+            cursor = await cursor_at(engine, depth)
+            results.append({
+                'depth': depth,
+                'offset_ms': await timed(
+                    client,
+                    f'/todos/?limit={args.limit}&offset={depth}',
+                    args.repeat,
+                ),
+                'cursor_ms': await timed(
+                    client,
+                    f'/todos/?limit={args.limit}&cursor={cursor}',
+                    args.repeat,
+                ),
+            })
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--todos', type=int, default=200_000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with PostgresContainer('postgres:16', driver='psycopg') as postgres:
+        results = asyncio.run(run(postgres.get_connection_url(), args))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
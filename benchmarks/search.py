@@ -0,0 +1,136 @@
+"""
+Latency of todo text search with and without the pg_trgm indexes.
+
+Seeds one user with `--todos` rows of random words, then times the
+`title=` / `description=` filters and the ranked `q=` search before and
+after dropping the trigram indexes.
+
+    python -m benchmarks.search --todos 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from testcontainers.postgres import PostgresContainer
+
+from fastzero.app import app
+from fastzero.database import get_session
+from fastzero.list_cache import todo_list_cache
+from fastzero.models import User, table_registry
+from fastzero.security import access_token_claims, create_access_token
+from fastzero.singleflight import todo_list_flights, user_flights
+
+WORDS = (
+    'buy milk call mom pay rent book flight fix bike clean garage water '
+    'plants walk dog read paper renew passport plan trip review report'
+).split()
+
+SEED_TODOS = text("""
+    INSERT INTO todos (title, description, state, user_id)
+    SELECT
+        w[1 + (g * 7) % cardinality(w)] || ' ' ||
+        w[1 + (g * 13) % cardinality(w)] || ' ' || g,
+        w[1 + (g * 17) % cardinality(w)] || ' ' ||
+        w[1 + (g * 19) % cardinality(w)] || ' ' || md5(g::text),
+        'todo', :user_id
+    FROM generate_series(1, :todos) AS g,
+         (SELECT CAST(:words AS text[]) AS w) AS words
+""")
+
+QUERIES = {
+    'title_common': '/todos/?title=passport&limit=100',
+    'title_rare': '/todos/?title=ssport 4242&limit=100',
+    'description_rare': '/todos/?description=abcdef&limit=100',
+    'q_common': '/todos/?q=renew&limit=100',
+    'q_rare': '/todos/?q=abcdef&limit=100',
+}
+
+
+async def seed(engine, todos):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        user_id = await conn.scalar(
+            insert(User)
+            .values(username='bench', email='bench@test.com', password='x')
+            .returning(User.id)
+        )
+        await conn.execute(
+            SEED_TODOS, {'user_id': user_id, 'todos': todos, 'words': WORDS}
+        )
+        await conn.execute(text('ANALYZE todos'))
+
+    return user_id
+
+
+async def measure(client, repeat):
+    results = {}
+    for name, url in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            resp = await client.get(url)
+            samples.append(time.perf_counter() - start)
+            resp.raise_for_status()
+        results[name] = round(statistics.median(samples) * 1000, 2)
+
+    return results
+
+
+async def run(url, args):
+    engine = create_async_engine(url)
+    user_id = await seed(engine, args.todos)
+
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    # every sample repeats the same URL: keep it from being served by
+    # the list cache or a render shared from the previous sample
+    todo_list_cache.ttl = 0
+    todo_list_flights.max_age = user_flights.max_age = 0
+
+    async with AsyncSession(engine) as session:
+        user = await session.get(User, user_id)
+        token = create_access_token(access_token_claims(user))
+
+    results = {}
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url='http://bench',
+        headers={'Authorization': f'Bearer {token}'},
+    ) as client:
+        results['trigram_ms'] = await measure(client, args.repeat)
+
+        async with engine.begin() as conn:
+            await conn.execute(text('DROP INDEX ix_todos_title_trgm'))
+            await conn.execute(text('DROP INDEX ix_todos_description_trgm'))
+
+        results['like_scan_ms'] = await measure(client, args.repeat)
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--todos', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with PostgresContainer('postgres:16', driver='psycopg') as postgres:
+        results = asyncio.run(run(postgres.get_connection_url(), args))
+
+    print(json.dumps({'todos': args.todos, **results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Cost of building a `GET /todos/` response body per 1,000 todos.
+
+Compares the default FastAPI path (ORM entities validated through the
+route's `response_model` and encoded by `JSONResponse`) with the fast path
+used by `list_todos` (column rows dumped straight to JSON). Fetch time,
+which includes entity hydration, and serialization time are reported
+separately.
+
+    python -m benchmarks.serialization --todos 1000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from testcontainers.postgres import PostgresContainer
+
+from fastzero.app import app
+from fastzero.models import Todo, User, table_registry
+from fastzero.serialization import TODO_COLUMNS, TODO_LIST_JSON, dump_rows
+
+SEED_TODOS = text("""
+    INSERT INTO todos (title, description, state, user_id)
+    SELECT 'todo ' || g, 'description ' || g, 'todo', :user_id
+    FROM generate_series(1, :todos) AS g
+""")
+
+
+def list_todos_field():
+    route = next(
+        route
+        for route in app.routes
+        if getattr(route, 'name', None) == 'list_todos'
+    )
+    return route.response_field
+
+
+async def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn()
+        samples.append(time.perf_counter() - start)
+
+    return result, statistics.median(samples)
+
+
+async def run(url, args):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        user_id = await conn.scalar(
+            insert(User)
+            .values(username='bench', email='bench@test.com', password='x')
+            .returning(User.id)
+        )
+        await conn.execute(
+            SEED_TODOS, {'user_id': user_id, 'todos': args.todos}
+        )
+
+    query = select(Todo).where(Todo.user_id == user_id).order_by(Todo.id)
+    field = list_todos_field()
+
+    async with AsyncSession(engine) as session:
+
+        async def fetch_entities():
+            session.expunge_all()
+            return (await session.scalars(query)).all()
+
+        async def fetch_rows():
+            return (
+                await session.execute(query.with_only_columns(*TODO_COLUMNS))
+            ).all()
+
+        todos, entities_fetch = await timed(fetch_entities, args.repeat)
+        rows, rows_fetch = await timed(fetch_rows, args.repeat)
+
+    async def validated():
+        content = await serialize_response(
+            field=field, response_content={'todos': todos, 'next_cursor': None}
+        )
+        return JSONResponse(content).body
+
+    async def direct():
+        return TODO_LIST_JSON.dump_json({
+            'todos': dump_rows(rows),
+            'next_cursor': None,
+        })
+
+    slow_body, validated_time = await timed(validated, args.repeat)
+    fast_body, direct_time = await timed(direct, args.repeat)
+    assert json.loads(slow_body) == json.loads(fast_body)
+
+    await engine.dispose()
+
+    per_1000 = 1000 / args.todos * 1000
+    return {
+        'todos': args.todos,
+        'per_1000_todos_ms': {
+            'orm_fetch': round(entities_fetch * per_1000, 2),
+            'orm_validate_and_encode': round(validated_time * per_1000, 2),
+            'rows_fetch': round(rows_fetch * per_1000, 2),
+            'rows_to_json': round(direct_time * per_1000, 2),
+        },
+        'serialization_speedup': round(validated_time / direct_time, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--todos', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with PostgresContainer('postgres:16', driver='psycopg') as postgres:
+        results = asyncio.run(run(postgres.get_connection_url(), args))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
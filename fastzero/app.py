@@ -1,9 +1,36 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from fastzero.routers import auth, todos, users
+from fastzero.database import replicas
+from fastzero.metrics import MetricsMiddleware
+from fastzero.profiling import SQLProfilerMiddleware
+from fastzero.routers import auth, internal, metrics, todos, users
+from fastzero.settings import Settings
+from fastzero.trash import trash_purger
+
+settings = Settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if replicas.engines:
+        replicas.start()
+    if settings.TRASH_PURGE_ENABLED:
+        trash_purger.start()
+    try:
+        yield
+    finally:
+        await trash_purger.stop()
+        await replicas.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(SQLProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(todos.router)
+app.include_router(internal.router)
+app.include_router(metrics.router)
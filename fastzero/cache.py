@@ -0,0 +1,82 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+
+class CacheBackend(Protocol):
+    """
+    Interface for caches shared by the app.
+
+    Values are plain data (dicts, strings, datetimes) so a backend shared
+    across workers can serialize them.
+    """
+
+    async def get(self, key: str) -> Any | None: ...
+
+    async def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+
+def sizeof(value: Any) -> int:
+    """Approximate memory held by a cached value, containers included."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(map(sizeof, value))
+    return sys.getsizeof(value)
+
+
+class LocalCache:
+    """
+    In-process TTL + LRU cache, the default `CacheBackend`.
+
+    Bounded by entry count and, when `max_bytes` is set, by the approximate
+    size of the stored values; the least recently used entries go first.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+
+    async def get(self, key: str):
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        value, expires_at, _ = item
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+
+        self._pop(key)
+        size = sizeof(value) if self.max_bytes is not None else 0
+        self._data[key] = (value, time.monotonic() + ttl, size)
+        self.size += size
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self.size > self.max_bytes
+        ):
+            self._pop(next(iter(self._data)))
+
+    async def delete(self, key: str):
+        self._pop(key)
+
+    def _pop(self, key: str):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size -= item[2]
+
+    def __len__(self):
+        return len(self._data)
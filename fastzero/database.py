@@ -1,11 +1,188 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+import asyncio
+import contextlib
+import itertools
+import time
+from contextlib import asynccontextmanager
 
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from fastzero.cache import CacheBackend, LocalCache
+from fastzero.metrics import PoolMetrics, registry
 from fastzero.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
 
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a connection.
+    """
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.wait.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def create_instrumented_engine(url: str, **kw):
+    engine = create_async_engine(url, poolclass=InstrumentedPool, **kw)
+    engine.pool.metrics = PoolMetrics()
+    engine.pool.metrics.listen(engine.pool)
+
+    return engine
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin among those that passed the last
+    health check.
+
+    Checks run every `check_interval` seconds in a background task started
+    with the app, so requests never wait on one: an unreachable replica is
+    skipped until it answers `SELECT 1` again, and none is picked before
+    the first check.
+    """
+
+    def __init__(self, engines, check_interval: float, check_timeout: float):
+        self.engines = list(engines)
+        self.healthy = []
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._counter = itertools.count()
+        self._task = None
+
+    async def _ping(self, engine):
+        async def ping():
+            async with engine.connect() as conn:
+                await conn.execute(text('SELECT 1'))
+
+        try:
+            await asyncio.wait_for(ping(), self.check_timeout)
+        except (OSError, TimeoutError, exc.SQLAlchemyError):
+            return False
+        return True
+
+    async def check(self):
+        results = await asyncio.gather(*map(self._ping, self.engines))
+        self.healthy = [e for e, ok in zip(self.engines, results) if ok]
+
+    async def run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    def pick(self):
+        if not self.healthy:
+            return None
+        return self.healthy[next(self._counter) % len(self.healthy)]
+
+
+settings = Settings()
+
+POOL_OPTIONS = {
+    'pool_size': settings.DATABASE_POOL_SIZE,
+    'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+    'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+    'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+    'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+}
+
+engine = create_instrumented_engine(settings.DATABASE_URL, **POOL_OPTIONS)
+
+replicas = ReplicaSet(
+    [
+        create_instrumented_engine(url, **POOL_OPTIONS)
+        for url in settings.DATABASE_REPLICA_URLS
+    ],
+    settings.DATABASE_REPLICA_CHECK_INTERVAL,
+    settings.DATABASE_REPLICA_CHECK_TIMEOUT,
+)
+
+recent_writes: CacheBackend = LocalCache()
+
+registry.histogram(
+    'fastzero_db_pool_wait_seconds',
+    'Time spent waiting to check out a pooled connection.',
+).add(engine.pool.metrics.wait)
+registry.gauge(
+    'fastzero_db_pool_checked_out',
+    'Connections currently checked out of the pool.',
+    lambda: engine.pool.checkedout(),  # noqa: PLW0108, the pool is recreated on dispose
+)
+registry.gauge(
+    'fastzero_db_pool_timeouts_total',
+    'Checkouts that gave up after pool_timeout.',
+    lambda: engine.pool.metrics.timeouts,
+    kind='counter',
+)
+
+
+def _written_key(user_id: int):
+    return f'wrote:{user_id}'
+
+
+class PrimarySession(AsyncSession):
+    """
+    Session on the primary that remembers which user committed through it.
+
+    `info['user_id']` is set once the request is authenticated; commits
+    then pin that user's reads to the primary for
+    `DATABASE_READ_YOUR_WRITES_WINDOW` seconds.
+    """
+
+    async def commit(self):
+        await super().commit()
+
+        user_id = self.info.get('user_id')
+        if replicas.engines and user_id is not None:
+            await recent_writes.set(
+                _written_key(user_id),
+                True,
+                settings.DATABASE_READ_YOUR_WRITES_WINDOW,
+            )
+
+
+async def get_session():
+    async with PrimarySession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@asynccontextmanager
+async def read_session(primary: AsyncSession, user_id: int | None):
+    """
+    Session for a read-only handler: a healthy replica, or `primary` when
+    no replica is available or `user_id` wrote within the sticky window.
+    """
+    replica = replicas.pick()
+    if replica is None or (
+        user_id is not None and await recent_writes.get(_written_key(user_id))
+    ):
+        yield primary
+        return
 
-def get_session():
-    with Session(engine) as session:
+    async with AsyncSession(replica, expire_on_commit=False) as session:
         yield session
@@ -0,0 +1,62 @@
+import hashlib
+from http import HTTPStatus
+
+from fastapi import HTTPException, Response
+
+
+def make_etag(*parts):
+    """Strong, opaque entity tag over `parts`."""
+    digest = hashlib.blake2b(
+        '|'.join(map(str, parts)).encode(), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def todo_etag(todo_id: int, updated_at):
+    return make_etag('todo', todo_id, updated_at.isoformat())
+
+
+def list_etag(user_id: int, params: str, count: int, digest):
+    """
+    Version of one page of a user's todo list.
+
+    `count` and `digest`, a sum of hashes of every row's id and
+    `updated_at`, cover the whole filtered set, so any insert, update or
+    delete in it changes the tag, including an update committed after a
+    later one. `params` pins the tag to one filter and page.
+    """
+    return make_etag('todos', user_id, params, count, digest)
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = True):
+    """
+    Whether an `If-None-Match` (weak comparison) or `If-Match` (strong
+    comparison) header value matches `etag`.
+    """
+    if header is None:
+        return False
+    if header.strip() == '*':
+        return True
+
+    for value in header.split(','):
+        candidate = value.strip()
+        if candidate.startswith('W/'):
+            if not weak:
+                continue
+            candidate = candidate.removeprefix('W/')
+        if candidate == etag:
+            return True
+
+    return False
+
+
+def not_modified(etag: str):
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag})
+
+
+def check_if_match(header: str | None, etag: str):
+    if header is not None and not etag_matches(header, etag, weak=False):
+        raise HTTPException(
+            status_code=HTTPStatus.PRECONDITION_FAILED,
+            detail='precondition failed',
+        )
@@ -0,0 +1,94 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from fastzero.metrics import Histogram, registry
+from fastzero.security import get_password_hash, verify_password
+from fastzero.settings import Settings
+
+settings = Settings()
+
+
+class PasswordHasher:
+    """
+    Runs Argon2 hashing in a dedicated process pool.
+
+    At most `workers + queue_size` jobs are accepted at once; anything
+    beyond that is rejected with 503 instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self.rejected = 0
+        self.latency = Histogram()
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    async def _submit(self, fn, *args):
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='server busy, try again later',
+                headers={'Retry-After': '1'},
+            )
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.latency.observe(time.perf_counter() - start)
+
+    async def hash(self, password: str):
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str):
+        return await self._submit(
+            verify_password, plain_password, hashed_password
+        )
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'pending': self.pending,
+            'queue_depth': max(self.pending - self.workers, 0),
+            'rejected': self.rejected,
+            'latency': self.latency.snapshot(),
+        }
+
+
+hasher = PasswordHasher(settings.HASH_WORKERS, settings.HASH_QUEUE_SIZE)
+
+registry.histogram(
+    'fastzero_password_hash_duration_seconds',
+    'Time from submission to completion of a hashing job.',
+).add(hasher.latency)
+registry.gauge(
+    'fastzero_password_hash_pending',
+    'Hashing jobs running or queued.',
+    lambda: hasher.pending,
+)
+registry.gauge(
+    'fastzero_password_hash_rejected_total',
+    'Hashing jobs rejected because the queue was full.',
+    lambda: hasher.rejected,
+    kind='counter',
+)
@@ -0,0 +1,69 @@
+import time
+
+from fastzero.cache import CacheBackend, LocalCache
+from fastzero.metrics import registry
+from fastzero.settings import Settings
+
+settings = Settings()
+
+LOOKUPS = registry.counter(
+    'fastzero_todo_list_cache_lookups_total',
+    'Todo list cache lookups by result.',
+    ('result',),
+)
+
+
+class TodoListCache:
+    """
+    Rendered `GET /todos/` responses, per user and normalized filter.
+
+    Entries are keyed by the user's current generation, so invalidating a
+    user is a single write: bumping the generation orphans every list
+    cached under the old one, and those age out through the backend's TTL
+    and LRU bounds. A read that raced a write stores its result under the
+    generation it started with, which is never served again.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def _generation_key(user_id: int):
+        return f'todos:generation:{user_id}'
+
+    async def generation(self, user_id: int):
+        # readers never write the generation, so they cannot overwrite a
+        # concurrent invalidation; entries cached under 0 expire no later
+        # than the generation set by the first invalidation after them
+        return await self.backend.get(self._generation_key(user_id)) or 0
+
+    @staticmethod
+    def _entry_key(user_id: int, generation: int, params: str):
+        return f'todos:{user_id}:{generation}:{params}'
+
+    async def get(self, user_id: int, generation: int, params: str):
+        entry = await self.backend.get(
+            self._entry_key(user_id, generation, params)
+        )
+        LOOKUPS.labels('miss' if entry is None else 'hit').inc()
+        return entry
+
+    async def set(self, user_id: int, generation: int, params: str, entry):
+        await self.backend.set(
+            self._entry_key(user_id, generation, params), entry, self.ttl
+        )
+
+    async def invalidate(self, user_id: int):
+        await self.backend.set(
+            self._generation_key(user_id), time.time_ns(), self.ttl
+        )
+
+
+todo_list_cache = TodoListCache(
+    LocalCache(
+        settings.TODO_LIST_CACHE_SIZE,
+        max_bytes=settings.TODO_LIST_CACHE_MAX_BYTES,
+    ),
+    settings.TODO_LIST_CACHE_TTL,
+)
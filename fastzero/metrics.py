@@ -0,0 +1,293 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+AGE_BUCKETS = (1, 10, 60, 300, 900, 1800, 3600, 4 * 3600, 24 * 3600)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.count
+
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Family:
+    """
+    A named metric with one child `Histogram` or `Counter` per label set.
+    """
+
+    def __init__(self, name, help, kind, labelnames, factory):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self._factory = factory
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._factory()
+        return child
+
+    def add(self, child, *values):
+        self.children[values] = child
+        return child
+
+
+class Registry:
+    """
+    Process-wide metric registry rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._callbacks = {}
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._family(
+            name, help, 'histogram', labelnames, lambda: Histogram(buckets)
+        )
+
+    def counter(self, name, help, labelnames=()):
+        return self._family(name, help, 'counter', labelnames, Counter)
+
+    def gauge(self, name, help, fn, kind='gauge'):
+        """Register a value read from `fn()` at scrape time."""
+        self._callbacks[name] = (help, kind, fn)
+
+    def _family(self, name, help, kind, labelnames, factory):
+        family = self._families.get(name)
+        if family is None:
+            family = Family(name, help, kind, labelnames, factory)
+            self._families[name] = family
+        return family
+
+    def render(self):
+        lines = []
+        for family in self._families.values():
+            lines.append(f'# HELP {family.name} {family.help}')
+            lines.append(f'# TYPE {family.name} {family.kind}')
+            for values, child in list(family.children.items()):
+                labels = list(zip(family.labelnames, values))
+                if family.kind == 'counter':
+                    lines.append(
+                        f'{family.name}{_labels(labels)} {child.value}'
+                    )
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(child.buckets, child.counts):
+                    cumulative += count
+                    le = [*labels, ('le', bound)]
+                    lines.append(
+                        f'{family.name}_bucket{_labels(le)} {cumulative}'
+                    )
+                le = [*labels, ('le', '+Inf')]
+                lines.extend((
+                    f'{family.name}_bucket{_labels(le)} {child.count}',
+                    f'{family.name}_sum{_labels(labels)} {child.sum}',
+                    f'{family.name}_count{_labels(labels)} {child.count}',
+                ))
+
+        for name, (help, kind, fn) in self._callbacks.items():
+            lines.extend((
+                f'# HELP {name} {help}',
+                f'# TYPE {name} {kind}',
+                f'{name} {fn()}',
+            ))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    'fastzero_http_request_duration_seconds',
+    'HTTP request latency by route template and status code.',
+    ('method', 'route', 'status'),
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    'fastzero_http_request_db_queries',
+    'Database statements executed per HTTP request.',
+    ('method', 'route'),
+    QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = registry.histogram(
+    'fastzero_http_request_db_duration_seconds',
+    'Time spent in database statements per HTTP request.',
+    ('method', 'route'),
+)
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+request_queries: ContextVar[QueryStats | None] = ContextVar(
+    'request_queries', default=None
+)
+
+
+# start times live on the statement's execution context rather than the
+# connection, so a statement that fails takes its own with it
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, *a):
+    if context is not None:
+        context.fastzero_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, *a):
+    start = getattr(context, 'fastzero_query_start', None)
+    if start is None:
+        return
+
+    elapsed = time.perf_counter() - start
+    stats = request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and database work per route.
+
+    Routes are labelled with their path template (`/todos/{todo_id}`), never
+    the raw path, so label cardinality stays bounded; requests that match
+    no route share the `unmatched` label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        stats = QueryStats()
+        token = request_queries.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_queries.reset(token)
+
+            route = scope.get('route')
+            path = route.path if route is not None else 'unmatched'
+            method = scope['method']
+            REQUEST_DURATION.labels(method, path, status).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(method, path).observe(stats.count)
+            REQUEST_DB_DURATION.labels(method, path).observe(stats.duration)
+
+
+class PoolMetrics:
+    """
+    Checkout telemetry for a connection pool.
+
+    `wait` is fed by `InstrumentedPool`; connection ages come from the
+    pool `connect`/`checkout` events.
+    """
+
+    def __init__(self):
+        self.wait = Histogram()
+        self.connection_age = Histogram(AGE_BUCKETS)
+        self.timeouts = 0
+
+    def listen(self, pool):
+        event.listen(pool, 'connect', self._on_connect)
+        event.listen(pool, 'checkout', self._on_checkout)
+
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info['connected_at'] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, proxy):
+        connected_at = connection_record.info.get('connected_at')
+        if connected_at is not None:
+            self.connection_age.observe(time.monotonic() - connected_at)
+
+    def snapshot(self, pool):
+        return {
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'timeouts': self.timeouts,
+            'wait': self.wait.snapshot(),
+            'connection_age': self.connection_age.snapshot(),
+        }
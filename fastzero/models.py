@@ -1,11 +1,19 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, ForeignKey, Index, event, func, text
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
 
+event.listen(
+    table_registry.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql'
+    ),
+)
+
 
 class TodoState(str, Enum):
     draft = 'draft'
@@ -18,37 +26,90 @@ class TodoState(str, Enum):
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
     email: Mapped[str] = mapped_column(unique=True)
+    token_version: Mapped[int] = mapped_column(
+        init=False, default=0, server_default='0'
+    )
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         init=False, onupdate=func.now(), server_default=func.now()
     )
+    # the database deletes a user's todos (ON DELETE CASCADE), the ORM
+    # never loads them for it
     todos: Mapped[list['Todo']] = relationship(
-        init=False, back_populates='user', cascade='all, delete-orphan'
+        init=False,
+        back_populates='user',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (
+        # live todos only: the trash stays out of the hot list path
+        Index(
+            'ix_todos_user_id_created_at_id',
+            'user_id',
+            'created_at',
+            'id',
+            postgresql_where=text('trashed_at IS NULL'),
+            postgresql_include=['updated_at'],
+        ),
+        Index(
+            'ix_todos_user_id_state_created_at_id',
+            'user_id',
+            'state',
+            'created_at',
+            'id',
+            postgresql_include=['updated_at', 'trashed_at'],
+        ),
+        Index(
+            'ix_todos_title_trgm',
+            'title',
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_todos_description_trgm',
+            'description',
+            postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+        ),
+        Index(
+            'ix_todos_trashed_at',
+            'trashed_at',
+            postgresql_where=text('trashed_at IS NOT NULL'),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
     description: Mapped[str]
     state: Mapped[TodoState]
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
+    # the time of the write, not of its transaction's start: a transaction
+    # that began earlier but commits later must not stamp an older version
     updated_at: Mapped[datetime] = mapped_column(
         init=False,
-        onupdate=func.now(),
+        onupdate=func.clock_timestamp(),
         server_default=func.now(),
     )
+    trashed_at: Mapped[datetime | None] = mapped_column(
+        init=False, default=None
+    )
     user: Mapped[User] = relationship(init=False, back_populates='todos')
@@ -0,0 +1,54 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from datetime import datetime
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+from fastzero.schemas import FilterPage
+
+
+def encode_cursor(values: list):
+    payload = json.dumps(values, default=datetime.isoformat)
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: tuple):
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(keys):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value)
+            if key.type.python_type is datetime
+            else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (Base64Error, TypeError, ValueError):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='invalid cursor'
+        )
+
+
+def paginate(query, page: FilterPage, *keys):
+    """
+    Orders `query` by `keys` (which must be unique together) and applies
+    the page: keyset when a cursor is given, legacy offset otherwise.
+    """
+    query = query.order_by(*keys).limit(page.limit)
+
+    if page.cursor:
+        values = decode_cursor(page.cursor, keys)
+        return query.where(tuple_(*keys) > tuple_(*values))
+
+    return query.offset(page.offset)
+
+
+def next_cursor(rows: list, page: FilterPage, *keys):
+    if not rows or len(rows) < page.limit:
+        return None
+
+    last = rows[-1]
+    return encode_cursor([getattr(last, key.key) for key in keys])
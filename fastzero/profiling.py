@@ -0,0 +1,198 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+
+from fastzero.settings import Settings
+
+settings = Settings()
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-SQL-Profile'
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN \(%\(\w+\)s(?:, %\(\w+\)s)*\)', re.IGNORECASE)
+
+
+def statement_shape(statement: str):
+    """
+    Normalize a statement so executions that differ only in parameters,
+    including the length of an expanded IN list, compare equal.
+    """
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return _IN_LIST.sub('IN (...)', statement)
+
+
+@dataclass
+class Query:
+    statement: str
+    parameters: object
+    duration: float
+
+
+class Profile:
+    """
+    Statements executed during one request (or one `capture` block).
+    """
+
+    def __init__(
+        self,
+        slow_ms: float | None = None,
+        repeat_threshold: int | None = None,
+    ):
+        self.slow_ms = (
+            settings.SQL_SLOW_QUERY_MS if slow_ms is None else slow_ms
+        )
+        self.repeat_threshold = (
+            settings.SQL_REPEATED_QUERY_THRESHOLD
+            if repeat_threshold is None
+            else repeat_threshold
+        )
+        self.queries: list[Query] = []
+        # on the statement's execution context: dropped with it on failure
+        self._start_key = f'fastzero_profile_start_{id(self)}'
+
+    def before(self, conn, cursor, statement, parameters, context, *args):
+        if context is not None:
+            setattr(context, self._start_key, time.perf_counter())
+
+    def after(self, conn, cursor, statement, parameters, context, *args):
+        start = getattr(context, self._start_key, None)
+        if start is None:
+            return
+
+        duration = time.perf_counter() - start
+        self.queries.append(Query(statement, parameters, duration))
+
+    @property
+    def duration(self):
+        return sum(query.duration for query in self.queries)
+
+    def repeated(self):
+        """Statement shapes executed at least `repeat_threshold` times."""
+        shapes = Counter(statement_shape(q.statement) for q in self.queries)
+        return {
+            shape: count
+            for shape, count in shapes.items()
+            if count >= self.repeat_threshold
+        }
+
+    def slow(self):
+        return [q for q in self.queries if q.duration * 1000 >= self.slow_ms]
+
+    @property
+    def flagged(self):
+        return bool(self.repeated() or self.slow())
+
+    def summary(self):
+        return (
+            f'queries={len(self.queries)};'
+            f'time_ms={self.duration * 1000:.2f};'
+            f'repeated={len(self.repeated())};'
+            f'slow={len(self.slow())}'
+        )
+
+    def report(self):
+        lines = [self.summary()]
+        lines.extend(
+            f'  repeated x{count}: {shape}'
+            for shape, count in self.repeated().items()
+        )
+        lines.extend(
+            f'  slow {q.duration * 1000:.2f}ms: '
+            f'{statement_shape(q.statement)} params={q.parameters!r}'
+            for q in self.slow()
+        )
+        return '\n'.join(lines)
+
+
+current_profile: ContextVar[Profile | None] = ContextVar(
+    'current_profile', default=None
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, *args):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.before(conn, *args)
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, *args):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.after(conn, *args)
+
+
+@contextmanager
+def capture(engine, **kw):
+    """
+    Profile every statement `engine` runs inside the block, whichever
+    task or thread issues it.
+    """
+    profile = Profile(**kw)
+    event.listen(engine, 'before_cursor_execute', profile.before)
+    event.listen(engine, 'after_cursor_execute', profile.after)
+    try:
+        yield profile
+    finally:
+        event.remove(engine, 'before_cursor_execute', profile.before)
+        event.remove(engine, 'after_cursor_execute', profile.after)
+
+
+class SQLProfilerMiddleware:
+    """
+    Opt-in per-request SQL profiling.
+
+    Enabled for every request by `SQL_PROFILE`, or per request with an
+    `X-SQL-Profile: 1` header when `SQL_PROFILE_HEADER` allows it. The
+    summary is returned in the `X-SQL-Profile` response header and the full
+    report, including parameters of slow statements, is logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def enabled(scope):
+        if settings.SQL_PROFILE:
+            return True
+        return (
+            settings.SQL_PROFILE_HEADER
+            and Headers(scope=scope).get(PROFILE_HEADER) == '1'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append(PROFILE_HEADER, profile.summary())
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            logger.log(
+                logging.WARNING if profile.flagged else logging.INFO,
+                'sql profile %s %s %s',
+                scope['method'],
+                scope['path'],
+                profile.report(),
+            )
@@ -0,0 +1,128 @@
+import math
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Protocol
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from fastzero.metrics import registry
+from fastzero.schemas import Principal
+from fastzero.security import get_current_principal
+from fastzero.settings import Settings
+
+settings = Settings()
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+RATE_LIMITED = registry.counter(
+    'fastzero_rate_limited_total',
+    'Requests rejected by a rate limit.',
+    labelnames=('limit',),
+)
+
+
+def parse_rate(rate: str):
+    """`'5/minute'` as (tokens refilled per second, bucket capacity)."""
+    count, _, period = rate.partition('/')
+    capacity = int(count)
+    return capacity / PERIODS[period], capacity
+
+
+def take_token(bucket, now: float, rate: float, capacity: int):
+    """
+    Refill `bucket`, a `(tokens, updated_at)` pair or None for a full one,
+    and debit a token from it.
+
+    Returns the new bucket and 0, or the bucket unchanged but refilled and
+    the seconds until a token is available.
+    """
+    tokens, updated_at = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class RateLimitStore(Protocol):
+    """
+    Token buckets, one per key.
+
+    `take` refills and debits a bucket in one step; a store shared across
+    workers has to make that atomic on its side (a Redis script, say).
+    """
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        """0 if a token was taken, else the seconds until one is free."""
+
+
+class LocalRateLimitStore:
+    """
+    In-process buckets, the default `RateLimitStore`.
+
+    Bounded by key count; the least recently used bucket is dropped first,
+    which at worst hands its key a full bucket again.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, rate: float, capacity: int):
+        bucket, wait = take_token(
+            self._buckets.pop(key, None), time.monotonic(), rate, capacity
+        )
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+rate_limit_store: RateLimitStore = LocalRateLimitStore(
+    settings.RATE_LIMIT_MAX_KEYS
+)
+
+
+async def check_rate_limit(limit: str, key: str):
+    """
+    Take a token from `key`'s bucket for `limit`, one of the `RATE_LIMITS`
+    settings, or reject the request with 429. Limits not configured are
+    not enforced.
+    """
+    rate = settings.RATE_LIMITS.get(limit)
+    if rate is None:
+        return
+
+    wait = await rate_limit_store.take(f'{limit}:{key}', *parse_rate(rate))
+    if wait:
+        RATE_LIMITED.labels(limit).inc()
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='too many requests',
+            headers={'Retry-After': str(math.ceil(wait))},
+        )
+
+
+async def limit_login(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends()
+):
+    """Throttle login attempts per client IP and per username."""
+    client = request.client.host if request.client else 'unknown'
+    await check_rate_limit('auth_token:ip', client)
+    await check_rate_limit('auth_token:username', form_data.username)
+
+
+def limit_user(route: str):
+    """Dependency throttling `route` per authenticated user."""
+
+    async def dependency(
+        principal: Principal = Depends(get_current_principal),
+    ):
+        await check_rate_limit(f'{route}:user', str(principal.id))
+
+    return dependency
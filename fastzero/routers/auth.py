@@ -3,26 +3,33 @@ from http import HTTPStatus
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastzero.database import get_session
+from fastzero.hashing import hasher
 from fastzero.models import User
-from fastzero.schemas import Token
+from fastzero.ratelimit import limit_login
+from fastzero.schemas import Principal, Token
 from fastzero.security import (
+    access_token_claims,
     create_access_token,
-    get_current_user,
-    verify_password,
+    get_current_principal,
 )
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 
-@router.post('/token', response_model=Token, status_code=HTTPStatus.OK)
-def login_for_access_token(
+@router.post(
+    '/token',
+    response_model=Token,
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(limit_login)],
+)
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
-    user = session.scalar(
+    user = await session.scalar(
         select(User).where(User.username == form_data.username)
     )
 
@@ -32,19 +39,21 @@ def login_for_access_token(
             detail='incorrect username or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await hasher.verify(form_data.password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='incorrect username or password',
         )
 
     return {
-        'access_token': create_access_token(data={'sub': user.username}),
+        'access_token': create_access_token(data=access_token_claims(user)),
         'token_type': 'bearer',
     }
 
 
 @router.post('/refresh_token', response_model=Token, status_code=HTTPStatus.OK)
-def refresh_access_token(user: User = Depends(get_current_user)):
-    new_access_token = create_access_token(data={'sub': user.username})
+async def refresh_access_token(
+    principal: Principal = Depends(get_current_principal),
+):
+    new_access_token = create_access_token(data=access_token_claims(principal))
     return {'access_token': new_access_token, 'token_type': 'bearer'}
@@ -0,0 +1,23 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends
+
+from fastzero.database import engine
+from fastzero.hashing import hasher
+from fastzero.security import require_internal_token
+
+router = APIRouter(
+    prefix='/internal',
+    tags=['internal'],
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get('/hashing', status_code=HTTPStatus.OK)
+async def hashing_stats():
+    return hasher.stats()
+
+
+@router.get('/pool', status_code=HTTPStatus.OK)
+async def pool_stats():
+    return engine.pool.metrics.snapshot(engine.pool)
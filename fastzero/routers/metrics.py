@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from fastzero.metrics import registry
+from fastzero.security import require_internal_token
+
+router = APIRouter(
+    tags=['internal'], dependencies=[Depends(require_internal_token)]
+)
+
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type='text/plain; version=0.0.4'
+    )
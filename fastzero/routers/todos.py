@@ -1,32 +1,115 @@
+from functools import partial
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session as SessionORM
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import extract, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastzero.database import get_session
-from fastzero.models import Todo, User
+from fastzero.etags import (
+    check_if_match,
+    etag_matches,
+    list_etag,
+    not_modified,
+    todo_etag,
+)
+from fastzero.list_cache import todo_list_cache
+from fastzero.models import Todo, TodoState
+from fastzero.pagination import next_cursor, paginate
+from fastzero.ratelimit import limit_user
 from fastzero.schemas import (
     FilterTodo,
     Message,
+    Principal,
+    TodoBulkCreate,
+    TodoBulkDelete,
+    TodoBulkResult,
+    TodoBulkUpdate,
+    TodoImportResult,
     TodoList,
     TodoPublic,
     TodoSchema,
+    TodoStats,
     TodoUpdate,
 )
-from fastzero.security import get_current_user
+from fastzero.search import search_todos
+from fastzero.security import get_current_principal, get_user_read_session
+from fastzero.serialization import (
+    TODO_COLUMNS,
+    TODO_JSON,
+    TODO_LIST_JSON,
+    dump_rows,
+    json_response,
+    read_csv,
+    read_lines,
+    read_ndjson,
+    stream_csv,
+    stream_ndjson,
+    stream_partitions,
+)
+from fastzero.settings import Settings
+from fastzero.singleflight import todo_list_flights
+
+router = APIRouter(
+    prefix='/todos',
+    tags=['todos'],
+    dependencies=[Depends(limit_user('todos'))],
+)
+
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_user_read_session)]
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+IfNoneMatch = Annotated[str | None, Header()]
+IfMatch = Annotated[str | None, Header()]
+
+TODO_PAGE_KEY = (Todo.created_at, Todo.id)
+
+settings = Settings()
+
+LIVE = Todo.trashed_at.is_(None)
+
+# version of a set of todos: the row count and an order-independent sum of
+# per-row hashes, so any insert, update or delete moves it whatever order
+# the writes commit in. Both come from the (user_id, ...) indexes, which
+# include updated_at, without visiting the table.
+LIST_VERSION = (
+    func.count(),
+    func.sum(
+        func.hashtextextended(
+            func.concat(Todo.id, ':', extract('epoch', Todo.updated_at)), 0
+        )
+    ),
+)
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
 
-router = APIRouter(prefix='/todos', tags=['todos'])
+COPY_TODOS = 'COPY todos (title, description, state, user_id) FROM STDIN'
 
-Session = Annotated[SessionORM, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+
+def check_bulk_size(items: list):
+    if len(items) > settings.TODO_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f'at most {settings.TODO_BULK_MAX_ITEMS} items per request',
+        )
 
 
 @router.post('/', response_model=TodoPublic, status_code=HTTPStatus.CREATED)
-def create_todo(
+async def create_todo(
     todo: TodoSchema,
-    user: CurrentUser,
+    user: CurrentPrincipal,
     session: Session,
 ):
     db_todo = Todo(
@@ -36,19 +119,21 @@ def create_todo(
         user_id=user.id,
     )
     session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
 
     return db_todo
 
 
-@router.get('/', response_model=TodoList, status_code=HTTPStatus.OK)
-def list_todos(
-    session: Session,
-    user: CurrentUser,
-    todo_filter: Annotated[FilterTodo, Query()],
-):
-    query = select(Todo).where(Todo.user_id == user.id)
+def filter_todos(user_id: int, todo_filter: FilterTodo, dialect: str):
+    """
+    The user's todos matching `todo_filter`, before ordering and paging.
+
+    Trashed todos are left out unless the filter asks for the trash.
+    """
+    query = select(Todo).where(Todo.user_id == user_id)
+    if todo_filter.state != TodoState.trash:
+        query = query.where(LIVE)
 
     if todo_filter.title:
         query = query.filter(Todo.title.contains(todo_filter.title))
@@ -56,66 +141,410 @@ def list_todos(
         query = query.filter(Todo.description.contains(todo_filter.description))
     if todo_filter.state:
         query = query.filter(Todo.state == todo_filter.state)
+    if todo_filter.q:
+        query = search_todos(query, todo_filter.q, dialect)
+
+    return query
+
+
+async def render_todo_list(
+    session: AsyncSession, user_id: int, todo_filter: FilterTodo, generation
+):
+    """The `GET /todos/` body and ETag, stored in the list cache."""
+    params = todo_filter.model_dump_json()
+    query = filter_todos(user_id, todo_filter, session.bind.dialect.name)
+    count, digest = (
+        await session.execute(
+            query.order_by(None).with_only_columns(*LIST_VERSION)
+        )
+    ).one()
+    etag = list_etag(user_id, params, count, digest)
 
-    todos = session.scalars(
-        query.offset(todo_filter.offset).limit(todo_filter.limit)
+    # plain column rows: no entity hydration and no response validation
+    todos = (
+        await session.execute(
+            paginate(
+                query.with_only_columns(*TODO_COLUMNS),
+                todo_filter,
+                *TODO_PAGE_KEY,
+            )
+        )
     ).all()
 
-    return {'todos': todos}
+    cursor = None
+    if not todo_filter.q:
+        cursor = next_cursor(todos, todo_filter, *TODO_PAGE_KEY)
+
+    body = TODO_LIST_JSON.dump_json({
+        'todos': dump_rows(todos),
+        'next_cursor': cursor,
+        'total': count if todo_filter.with_total else None,
+    }).decode()
+    entry = {'etag': etag, 'body': body}
+    await todo_list_cache.set(user_id, generation, params, entry)
+
+    return entry
+
+
+@router.get('/', response_model=TodoList, status_code=HTTPStatus.OK)
+async def list_todos(
+    session: ReadSession,
+    user: CurrentPrincipal,
+    todo_filter: Annotated[FilterTodo, Query()],
+    if_none_match: IfNoneMatch = None,
+):
+    if todo_filter.q:
+        # ranked matches are paged by offset, the keyset order does not apply
+        todo_filter.cursor = None
+    params = todo_filter.model_dump_json()
+
+    generation = await todo_list_cache.generation(user.id)
+    entry = await todo_list_cache.get(user.id, generation, params)
+    if entry is None:
+        # identical concurrent misses share one query; keyed by generation
+        # so a request made after a write never joins a read from before it
+        entry = await todo_list_flights.do(
+            (user.id, generation, params),
+            partial(
+                render_todo_list, session, user.id, todo_filter, generation
+            ),
+        )
+
+    if etag_matches(if_none_match, entry['etag']):
+        return not_modified(entry['etag'])
+    return json_response(entry['body'], {'ETag': entry['etag']})
+
+
+@router.get('/stats', response_model=TodoStats, status_code=HTTPStatus.OK)
+async def todo_stats(session: ReadSession, user: CurrentPrincipal):
+    """
+    The user's todo count per state, the trash included, and the total
+    outside the trash.
+
+    One GROUP BY over the user's `(user_id, state, ...)` index entries,
+    cached like the lists until the user's next write.
+    """
+    generation = await todo_list_cache.generation(user.id)
+    body = await todo_list_cache.get(user.id, generation, 'stats')
+    if body is None:
+        counts = dict(
+            (
+                await session.execute(
+                    select(Todo.state, func.count())
+                    .where(Todo.user_id == user.id)
+                    .group_by(Todo.state)
+                )
+            ).all()
+        )
+        body = TodoStats(
+            total=sum(
+                count
+                for state, count in counts.items()
+                if state != TodoState.trash
+            ),
+            states={state: counts.get(state, 0) for state in TodoState},
+        ).model_dump_json()
+        await todo_list_cache.set(user.id, generation, 'stats', body)
+
+    return json_response(body)
+
+
+@router.get('/export', status_code=HTTPStatus.OK)
+async def export_todos(
+    session: ReadSession,
+    user: CurrentPrincipal,
+    export_format: Annotated[
+        Literal['ndjson', 'csv'], Query(alias='format')
+    ] = 'ndjson',
+):
+    """
+    Stream all of the user's todos as NDJSON or CSV, oldest first.
+
+    Rows come from a server-side cursor in batches of `EXPORT_BATCH_SIZE`,
+    so memory stays flat however many todos the user has.
+    """
+    query = (
+        select(*TODO_COLUMNS)
+        .where(Todo.user_id == user.id, LIVE)
+        .order_by(*TODO_PAGE_KEY)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    partitions = stream_partitions(session.bind, query)
+
+    if export_format == 'csv':
+        body = stream_csv(TODO_JSON, partitions, TodoPublic.model_fields)
+        media_type = 'text/csv'
+    else:
+        body = stream_ndjson(TODO_JSON, partitions)
+        media_type = 'application/x-ndjson'
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format}"'
+            )
+        },
+    )
+
+
+async def copy_todos(session: AsyncSession, rows: list[tuple]):
+    """Write `rows` with COPY inside the session's transaction."""
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    async with raw.driver_connection.cursor() as cursor:
+        async with cursor.copy(COPY_TODOS) as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+def describe_errors(exc: ValidationError):
+    return '; '.join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+        if error['loc']
+        else error['msg']
+        for error in exc.errors()
+    )
+
+
+@router.post(
+    '/import', response_model=TodoImportResult, status_code=HTTPStatus.OK
+)
+async def import_todos(
+    request: Request,
+    session: Session,
+    user: CurrentPrincipal,
+    import_format: Annotated[
+        Literal['ndjson', 'csv'], Query(alias='format')
+    ] = 'ndjson',
+):
+    """
+    Load todos from a streamed NDJSON or CSV body.
+
+    Rows are validated as they arrive and written with COPY in batches of
+    `IMPORT_BATCH_SIZE`, so only one batch is held in memory. Rejected rows
+    are counted and the first `TODO_IMPORT_MAX_ERRORS` reported by line.
+    Accepted rows are committed together.
+    """
+    max_length = settings.TODO_IMPORT_MAX_LINE_LENGTH
+    lines = read_lines(request.stream(), max_length)
+    if import_format == 'csv':
+        records = read_csv(lines, max_length)
+        validate = TodoSchema.model_validate
+    else:
+        records = read_ndjson(lines)
+        validate = TodoSchema.model_validate_json
+
+    accepted = 0
+    rejected = 0
+    errors = []
+    batch = []
+    async for number, record in records:
+        try:
+            todo = validate(record)
+        except ValidationError as exc:
+            rejected += 1
+            if len(errors) < settings.TODO_IMPORT_MAX_ERRORS:
+                errors.append({'line': number, 'error': describe_errors(exc)})
+            continue
+
+        batch.append((todo.title, todo.description, todo.state.value, user.id))
+        if len(batch) == IMPORT_BATCH_SIZE:
+            await copy_todos(session, batch)
+            accepted += len(batch)
+            batch = []
+
+    if batch:
+        await copy_todos(session, batch)
+        accepted += len(batch)
+    await session.commit()
+    if accepted:
+        await todo_list_cache.invalidate(user.id)
+
+    return {'accepted': accepted, 'rejected': rejected, 'errors': errors}
+
+
+@router.post(
+    '/bulk', response_model=TodoBulkResult, status_code=HTTPStatus.CREATED
+)
+async def bulk_create_todos(
+    bulk: TodoBulkCreate, user: CurrentPrincipal, session: Session
+):
+    check_bulk_size(bulk.todos)
+    if not bulk.todos:
+        return {'results': []}
+
+    db_todos = await session.scalars(
+        insert(Todo).returning(Todo, sort_by_parameter_order=True),
+        [{**todo.model_dump(), 'user_id': user.id} for todo in bulk.todos],
+    )
+    results = [
+        {'id': db_todo.id, 'status': 'created', 'todo': db_todo}
+        for db_todo in db_todos
+    ]
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
+
+    return {'results': results}
+
+
+@router.patch('/bulk', response_model=TodoBulkResult, status_code=HTTPStatus.OK)
+async def bulk_patch_todos(
+    bulk: TodoBulkUpdate, user: CurrentPrincipal, session: Session
+):
+    check_bulk_size(bulk.todos)
+    ids = {item.id for item in bulk.todos}
+    owned = set(
+        await session.scalars(
+            select(Todo.id).where(
+                Todo.user_id == user.id, Todo.id.in_(ids), LIVE
+            )
+        )
+    )
+
+    values = [
+        item.model_dump(exclude_unset=True) | {'id': item.id}
+        for item in bulk.todos
+        if item.id in owned and item.model_fields_set - {'id'}
+    ]
+    if values:
+        # bulk UPDATE by primary key, executed as one executemany per key set
+        await session.execute(update(Todo), values)
+
+    db_todos = {
+        db_todo.id: db_todo
+        for db_todo in await session.scalars(
+            select(Todo).where(Todo.id.in_(owned))
+        )
+    }
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
+
+    return {
+        'results': [
+            {'id': item.id, 'status': 'updated', 'todo': db_todos[item.id]}
+            if item.id in owned
+            else {'id': item.id, 'status': 'not_found'}
+            for item in bulk.todos
+        ]
+    }
+
+
+@router.delete(
+    '/bulk', response_model=TodoBulkResult, status_code=HTTPStatus.OK
+)
+async def bulk_delete_todos(
+    bulk: TodoBulkDelete, user: CurrentPrincipal, session: Session
+):
+    check_bulk_size(bulk.ids)
+    deleted = set(
+        await session.scalars(
+            update(Todo)
+            .where(Todo.user_id == user.id, Todo.id.in_(bulk.ids), LIVE)
+            .values(state=TodoState.trash, trashed_at=func.now())
+            .returning(Todo.id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
+
+    return {
+        'results': [
+            {
+                'id': todo_id,
+                'status': 'deleted' if todo_id in deleted else 'not_found',
+            }
+            for todo_id in bulk.ids
+        ]
+    }
 
 
 @router.patch(
     '/{todo_id}', response_model=TodoPublic, status_code=HTTPStatus.OK
 )
-def patch_todo(
-    todo_id: int, session: Session, user: CurrentUser, todo: TodoUpdate
+async def patch_todo(  # noqa: PLR0913, PLR0917
+    todo_id: int,
+    session: Session,
+    user: CurrentPrincipal,
+    todo: TodoUpdate,
+    response: Response,
+    if_match: IfMatch = None,
 ):
-    db_todo = session.scalar(
-        select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
+    query = select(Todo).where(
+        Todo.user_id == user.id, Todo.id == todo_id, LIVE
     )
+    if if_match is not None:
+        # hold the row until commit so the precondition cannot go stale
+        query = query.with_for_update()
+    db_todo = await session.scalar(query)
 
     if not db_todo:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='task not found',
         )
+    check_if_match(if_match, todo_etag(db_todo.id, db_todo.updated_at))
 
     for key, value in todo.model_dump(exclude_unset=True).items():
         setattr(db_todo, key, value)
 
     session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
 
+    response.headers['ETag'] = todo_etag(db_todo.id, db_todo.updated_at)
     return db_todo
 
 
 @router.delete('/{todo_id}', response_model=Message, status_code=HTTPStatus.OK)
-def delete_todo(todo_id: int, session: Session, user: CurrentUser):
+async def delete_todo(
+    todo_id: int,
+    session: Session,
+    user: CurrentPrincipal,
+    if_match: IfMatch = None,
+):
     """
     Delete task
     """
-    db_todo = session.scalar(
-        select(Todo).where(Todo.id == todo_id, Todo.user_id == user.id)
+    query = select(Todo).where(
+        Todo.id == todo_id, Todo.user_id == user.id, LIVE
     )
+    if if_match is not None:
+        query = query.with_for_update()
+    db_todo = await session.scalar(query)
 
     if not db_todo:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='task not found',
         )
+    check_if_match(if_match, todo_etag(db_todo.id, db_todo.updated_at))
 
-    session.delete(db_todo)
-    session.commit()
+    # into the trash; the purge worker deletes it after TRASH_RETENTION
+    db_todo.state = TodoState.trash
+    db_todo.trashed_at = func.now()
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
 
     return {'message': 'task deleted'}
 
 
 @router.get('/{todo_id}', response_model=TodoPublic, status_code=HTTPStatus.OK)
-def get_todo(todo_id: int, session: Session, user: CurrentUser):
-    db_todo = session.scalar(
-        select(Todo).where(Todo.id == todo_id, Todo.user_id == user.id)
-    )
+async def get_todo(
+    todo_id: int,
+    session: ReadSession,
+    user: CurrentPrincipal,
+    if_none_match: IfNoneMatch = None,
+):
+    db_todo = (
+        await session.execute(
+            select(*TODO_COLUMNS).where(
+                Todo.id == todo_id, Todo.user_id == user.id, LIVE
+            )
+        )
+    ).one_or_none()
 
     if not db_todo:
         raise HTTPException(
@@ -123,4 +552,8 @@ def get_todo(todo_id: int, session: Session, user: CurrentUser):
             detail='task not found',
         )
 
-    return db_todo
+    etag = todo_etag(db_todo.id, db_todo.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    return json_response(TODO_JSON.dump_json(db_todo._asdict()), {'ETag': etag})
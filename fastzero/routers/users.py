@@ -1,13 +1,17 @@
+from functools import partial
 from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from sqlalchemy import delete, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session as SessionORM
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastzero.database import get_session
+from fastzero.hashing import hasher
+from fastzero.list_cache import todo_list_cache
 from fastzero.models import User
+from fastzero.pagination import next_cursor, paginate
 from fastzero.schemas import (
     FilterPage,
     Message,
@@ -17,18 +21,28 @@ from fastzero.schemas import (
 )
 from fastzero.security import (
     get_current_user,
-    get_password_hash,
+    get_read_session,
+    invalidate_principal,
 )
+from fastzero.serialization import (
+    USER_COLUMNS,
+    USER_JSON,
+    USER_LIST_JSON,
+    dump_rows,
+    json_response,
+)
+from fastzero.singleflight import user_flights
 
 router = APIRouter(prefix='/users', tags=['users'])
 
-Session = Annotated[SessionORM, Depends(get_session)]
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session: Session):
-    db_user = session.scalar(
+async def create_user(user: UserSchema, session: Session):
+    db_user = await session.scalar(
         select(User).where(
             (User.username == user.username) | (User.email == user.email)
         )
@@ -49,36 +63,54 @@ def create_user(user: UserSchema, session: Session):
     new_user = User(
         username=user.username,
         email=user.email,
-        password=get_password_hash(user.password),
+        password=await hasher.hash(user.password),
     )
 
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
 
     return new_user
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
-def read_users(session: Session, filter_users: Annotated[FilterPage, Query()]):
-    users = session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+async def read_users(
+    session: ReadSession, filter_users: Annotated[FilterPage, Query()]
+):
+    users = (
+        await session.execute(
+            paginate(select(*USER_COLUMNS), filter_users, User.id)
+        )
     ).all()
-    return {'users': users}
 
+    return json_response(
+        USER_LIST_JSON.dump_json({
+            'users': dump_rows(users),
+            'next_cursor': next_cursor(users, filter_users, User.id),
+        })
+    )
 
-@router.get('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-def read_user(user_id: int, session: Session):
-    user = session.scalar(select(User).where(User.id == user_id))
+
+async def render_user(session: AsyncSession, user_id: int):
+    user = (
+        await session.execute(select(*USER_COLUMNS).where(User.id == user_id))
+    ).one_or_none()
     if not user:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='user not found'
         )
-    return user
+    return USER_JSON.dump_json(user._asdict())
+
+
+@router.get('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
+async def read_user(user_id: int, session: ReadSession):
+    body = await user_flights.do(
+        user_id, partial(render_user, session, user_id)
+    )
+    return json_response(body)
 
 
 @router.put('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-def update_user(
+async def update_user(
     user_id: int,
     user: UserSchema,
     session: Session,
@@ -89,14 +121,26 @@ def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='not enough permissions'
         )
 
+    password = await hasher.hash(user.password)
     try:
-        current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
-        current_user.email = user.email
-        session.commit()
-        session.refresh(current_user)
+        # the version is bumped in SQL: `current_user` may come from the
+        # principal cache and hold a stale one
+        db_user = await session.scalar(
+            update(User)
+            .where(User.id == current_user.id)
+            .values(
+                username=user.username,
+                password=password,
+                email=user.email,
+                token_version=User.token_version + 1,
+            )
+            .returning(User)
+        )
+        await session.commit()
+        await invalidate_principal(db_user.id)
+        user_flights.forget(db_user.id)
 
-        return current_user
+        return db_user
     except IntegrityError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
@@ -105,7 +149,7 @@ def update_user(
 
 
 @router.delete('/{user_id}', status_code=HTTPStatus.OK, response_model=Message)
-def delete_user(
+async def delete_user(
     user_id: int,
     session: Session,
     current_user: CurrentUser,
@@ -114,7 +158,11 @@ def delete_user(
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='not enough permissions'
         )
-    session.delete(current_user)
-    session.commit()
+    # one statement; the database removes the todos through the cascade
+    await session.execute(delete(User).where(User.id == current_user.id))
+    await session.commit()
+    await invalidate_principal(current_user.id)
+    await todo_list_cache.invalidate(current_user.id)
+    user_flights.forget(current_user.id)
 
     return {'message': 'user deleted'}
@@ -28,6 +28,7 @@ class UserPublic(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
@@ -35,13 +36,17 @@ class Token(BaseModel):
     token_type: str
 
 
-class TokenData(BaseModel):
-    username: str | None = None
+class Principal(BaseModel):
+    id: int
+    username: str
+    token_version: int
+    expires_at: int
 
 
 class FilterPage(BaseModel):
     offset: int = 0
     limit: int = 100
+    cursor: str | None = None
 
 
 class TodoSchema(BaseModel):
@@ -64,9 +69,55 @@ class TodoPublic(TodoSchema):
 
 class TodoList(BaseModel):
     todos: list[TodoPublic]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class TodoStats(BaseModel):
+    total: int
+    states: dict[TodoState, int]
+
+
+class TodoBulkCreate(BaseModel):
+    todos: list[TodoSchema]
+
+
+class TodoBulkUpdateItem(TodoUpdate):
+    id: int
+
+
+class TodoBulkUpdate(BaseModel):
+    todos: list[TodoBulkUpdateItem]
+
+
+class TodoBulkDelete(BaseModel):
+    ids: list[int]
+
+
+class TodoBulkItem(BaseModel):
+    id: int
+    status: str
+    todo: TodoPublic | None = None
+
+
+class TodoBulkResult(BaseModel):
+    results: list[TodoBulkItem]
+
+
+class TodoImportError(BaseModel):
+    line: int
+    error: str
+
+
+class TodoImportResult(BaseModel):
+    accepted: int
+    rejected: int
+    errors: list[TodoImportError]
 
 
 class FilterTodo(FilterPage):
+    q: str | None = None
     title: str | None = None
     description: str | None = None
     state: TodoState | None = None
+    with_total: bool = False
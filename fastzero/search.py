@@ -0,0 +1,25 @@
+from sqlalchemy import func
+
+from fastzero.models import Todo
+
+
+def search_todos(query, q: str, dialect: str):
+    """
+    Case-insensitive match of `q` in the title or description.
+
+    On Postgres the match is served by the pg_trgm indexes and results are
+    ranked by trigram similarity; other dialects fall back to plain LIKE.
+    """
+    query = query.where(
+        Todo.title.icontains(q, autoescape=True)
+        | Todo.description.icontains(q, autoescape=True)
+    )
+
+    if dialect != 'postgresql':
+        return query
+
+    rank = func.greatest(
+        func.similarity(Todo.title, q),
+        func.similarity(Todo.description, q),
+    )
+    return query.order_by(rank.desc())
@@ -1,3 +1,5 @@
+import hmac
+import time
 from datetime import datetime, timedelta
 from http import HTTPStatus
 
@@ -5,18 +7,25 @@ from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 from pwdlib import PasswordHash
+from pydantic import ValidationError
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 from zoneinfo import ZoneInfo
 
-from fastzero.database import get_session
+from fastzero.cache import CacheBackend, LocalCache
+from fastzero.database import get_session, read_session
 from fastzero.models import User
-from fastzero.schemas import TokenData
+from fastzero.schemas import Principal
 from fastzero.settings import Settings
 
 pwd_context = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl='auth/token', auto_error=False
+)
 settings = Settings()
+principal_cache: CacheBackend = LocalCache(settings.PRINCIPAL_CACHE_SIZE)
 
 
 def create_access_token(data: dict):
@@ -36,6 +45,61 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+def access_token_claims(user: User | Principal):
+    return {
+        'sub': user.username,
+        'uid': user.id,
+        'ver': user.token_version,
+    }
+
+
+def _user_key(user_id: int):
+    return f'principal:{user_id}'
+
+
+def _version_key(user_id: int):
+    return f'token_version:{user_id}'
+
+
+def _cache_ttl(principal: Principal):
+    return min(settings.PRINCIPAL_CACHE_TTL, principal.expires_at - time.time())
+
+
+def _user_to_cache(user: User):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'token_version': user.token_version,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at,
+    }
+
+
+async def _user_from_cache(session: AsyncSession, cached: dict):
+    user = User(
+        username=cached['username'],
+        password='',
+        email=cached['email'],
+    )
+    user.id = cached['id']
+    user.token_version = cached['token_version']
+    user.created_at = cached['created_at']
+    user.updated_at = cached['updated_at']
+    make_transient_to_detached(user)
+
+    # the hash is never cached; it is loaded again only if something reads it
+    user = await session.merge(user, load=False)
+    session.expire(user, ['password'])
+
+    return user
+
+
+async def invalidate_principal(user_id: int):
+    await principal_cache.delete(_user_key(user_id))
+    await principal_cache.delete(_version_key(user_id))
+
+
 def get_password_hash(password: str):
     return pwd_context.hash(password)
 
@@ -44,32 +108,124 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_current_user(
-    session: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
+credentials_exception = HTTPException(
+    status_code=HTTPStatus.UNAUTHORIZED,
+    detail='could not validate credentials',
+    headers={'WWW-Authenticate': 'Bearer'},
+)
+
+
+def require_internal_token(
+    token: str | None = Depends(optional_oauth2_scheme),
 ):
-    credentials_exception = HTTPException(
-        status_code=HTTPStatus.UNAUTHORIZED,
-        detail='could not validate credentials',
-        headers={'WWW-Authenticate': 'Bearer'},
-    )
+    """
+    Gate for the operational endpoints, `/internal/*` and `/metrics`: the
+    request has to bear `INTERNAL_TOKEN`. Without one configured they
+    answer 404, like a route that does not exist.
+    """
+    if not settings.INTERNAL_TOKEN:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Not Found'
+        )
+
+    if token is None or not hmac.compare_digest(
+        token.encode(), settings.INTERNAL_TOKEN.encode()
+    ):
+        raise credentials_exception
+
+
+async def _current_token_version(session: AsyncSession, principal: Principal):
+    cache_key = _version_key(principal.id)
+    version = await principal_cache.get(cache_key)
+    if version is None:
+        version = await session.scalar(
+            select(User.token_version).where(User.id == principal.id)
+        )
+        if version is not None:
+            await principal_cache.set(cache_key, version, _cache_ttl(principal))
+
+    return version
+
+
+async def get_current_principal(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    Identity taken from the token claims alone.
+
+    The only state checked is the user's token version (cached), so
+    tokens issued before a password change or a deletion are rejected.
+    """
     try:
         payload = decode(
             token, settings.SECRET_KEY, algorithms=settings.ALGORITHM
         )
-        username: str = payload.get('sub')
-        if not username:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except DecodeError:
+        principal = Principal(
+            id=payload['uid'],
+            username=payload['sub'],
+            token_version=payload['ver'],
+            expires_at=payload['exp'],
+        )
+    except (DecodeError, ExpiredSignatureError, KeyError, ValidationError):
         raise credentials_exception
-    except ExpiredSignatureError:
+
+    if await _current_token_version(session, principal) != (
+        principal.token_version
+    ):
         raise credentials_exception
 
-    user = session.scalar(
-        select(User).where(User.username == token_data.username)
-    )
+    session.info['user_id'] = principal.id
+
+    return principal
+
+
+async def get_optional_principal(
+    session: AsyncSession = Depends(get_session),
+    token: str | None = Depends(optional_oauth2_scheme),
+):
+    """Principal for public routes, or None for a missing or bad token."""
+    if token is None:
+        return None
+
+    try:
+        return await get_current_principal(session, token)
+    except HTTPException:
+        return None
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(get_current_principal),
+):
+    cache_key = _user_key(principal.id)
+    cached = await principal_cache.get(cache_key)
+    if cached:
+        return await _user_from_cache(session, cached)
+
+    user = await session.scalar(select(User).where(User.id == principal.id))
 
     if not user:
         raise credentials_exception
 
+    await principal_cache.set(
+        cache_key, _user_to_cache(user), _cache_ttl(principal)
+    )
+
     return user
+
+
+async def get_read_session(
+    session: AsyncSession = Depends(get_session),
+    principal: Principal | None = Depends(get_optional_principal),
+):
+    async with read_session(session, principal and principal.id) as reader:
+        yield reader
+
+
+async def get_user_read_session(
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(get_current_principal),
+):
+    async with read_session(session, principal.id) as reader:
+        yield reader
@@ -0,0 +1,174 @@
+import codecs
+import csv
+import io
+from http import HTTPStatus
+from typing import TypedDict
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, TypeAdapter
+
+from fastzero.models import Todo, User
+from fastzero.schemas import TodoList, TodoPublic, UserList, UserPublic
+
+
+def columns(model, schema: type[BaseModel]):
+    """The mapped columns behind each field of `schema`, in field order."""
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def row_type(schema: type[BaseModel], **fields):
+    """
+    TypedDict mirroring `schema`, with `fields` overriding annotations.
+
+    Wrapped in a `TypeAdapter` it serializes plain dicts with the schema's
+    types known up front, without building model instances.
+    """
+    annotations = {
+        name: field.annotation for name, field in schema.model_fields.items()
+    }
+    return TypedDict(f'{schema.__name__}Row', annotations | fields)
+
+
+def dump_rows(rows):
+    """
+    Column rows as plain dicts.
+
+    Rows selected through `columns` already hold exactly the schema's
+    fields with database-checked types, so they are not validated again.
+    """
+    return [row._asdict() for row in rows]
+
+
+async def stream_partitions(engine, query):
+    """
+    Row batches of `query` read through a server-side cursor.
+
+    Uses its own connection on `engine`: the request's session is closed
+    before a streaming body runs. Batch size follows the query's
+    `yield_per` execution option.
+    """
+    async with engine.connect() as conn:
+        result = await conn.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+
+async def stream_ndjson(adapter: TypeAdapter, partitions):
+    async for rows in partitions:
+        yield b''.join(adapter.dump_json(row._asdict()) + b'\n' for row in rows)
+
+
+async def stream_csv(adapter: TypeAdapter, partitions, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields)
+
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            adapter.dump_python(row._asdict(), mode='json') for row in rows
+        )
+        yield buffer.getvalue()
+
+
+async def read_lines(chunks, max_length: int):
+    """
+    Numbered lines of a streamed UTF-8 body. Carriage returns are kept, as
+    they may belong to a quoted CSV field.
+
+    Only the line being assembled is buffered, and a line longer than
+    `max_length` characters aborts the request.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    number = 0
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split('\n')
+            for line in lines:
+                number += 1
+                yield number, line
+            if len(pending) > max_length:
+                raise HTTPException(
+                    status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    detail=f'line {number + 1} is too long',
+                )
+        pending += decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='body is not valid utf-8',
+        )
+
+    if pending:
+        yield number + 1, pending
+
+
+async def read_ndjson(lines):
+    """JSON documents of numbered lines, skipping blank ones."""
+    async for number, line in lines:
+        if line.strip():
+            yield number, line
+
+
+async def csv_records(lines, max_length: int):
+    """
+    Numbered lines joined into CSV records, as a quoted field may span
+    lines. A record keeps the number of the line it starts on.
+    """
+    start = 0
+    record = None
+    async for number, line in lines:
+        if record is None:
+            start, record = number, line
+        else:
+            record += '\n' + line
+
+        if record.count('"') % 2 == 0:
+            yield start, record
+            record = None
+        elif len(record) > max_length:
+            raise HTTPException(
+                status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                detail=f'line {start} is too long',
+            )
+
+    if record is not None:
+        yield start, record
+
+
+async def read_csv(lines, max_length: int):
+    """CSV records of numbered lines as dicts keyed by the header row."""
+    header = None
+    async for number, record in csv_records(lines, max_length):
+        if not record.strip():
+            continue
+        fields = next(csv.reader([record]))
+        if header is None:
+            header = fields
+        else:
+            yield number, dict(zip(header, fields))
+
+
+def json_response(body: bytes | str, headers: dict | None = None):
+    return Response(body, media_type='application/json', headers=headers)
+
+
+# Read layer: read-only handlers select these columns as rows (never the
+# mapped entities, so nothing enters the identity map and the password hash
+# is never loaded) and dump them with the matching adapter.
+USER_COLUMNS = columns(User, UserPublic)
+TODO_COLUMNS = columns(Todo, TodoPublic)
+
+USER_JSON = TypeAdapter(row_type(UserPublic))
+USER_LIST_JSON = TypeAdapter(
+    row_type(UserList, users=list[row_type(UserPublic)])
+)
+TODO_JSON = TypeAdapter(row_type(TodoPublic))
+TODO_LIST_JSON = TypeAdapter(
+    row_type(TodoList, todos=list[row_type(TodoPublic)])
+)
@@ -10,3 +10,39 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRES_IN_MINUTES: int
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_SIZE: int = 32
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    TODO_BULK_MAX_ITEMS: int = 1000
+    TODO_IMPORT_MAX_ERRORS: int = 100
+    TODO_IMPORT_MAX_LINE_LENGTH: int = 64 * 1024
+    TRASH_RETENTION: float = 30 * 24 * 3600
+    TRASH_PURGE_ENABLED: bool = True
+    TRASH_PURGE_BATCH_SIZE: int = 500
+    TRASH_PURGE_RATE: float = 1000
+    TRASH_PURGE_INTERVAL: float = 60
+    TODO_LIST_CACHE_TTL: float = 30
+    TODO_LIST_CACHE_SIZE: int = 10_000
+    TODO_LIST_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SINGLE_FLIGHT_MAX_AGE: float = 1
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_CHECK_INTERVAL: float = 5
+    DATABASE_REPLICA_CHECK_TIMEOUT: float = 1
+    DATABASE_READ_YOUR_WRITES_WINDOW: float = 5
+    SQL_PROFILE: bool = False
+    SQL_PROFILE_HEADER: bool = False
+    SQL_SLOW_QUERY_MS: float = 100
+    SQL_REPEATED_QUERY_THRESHOLD: int = 3
+    RATE_LIMITS: dict[str, str] = {
+        'auth_token:ip': '30/minute',
+        'auth_token:username': '10/minute',
+        'todos:user': '600/minute',
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    INTERNAL_TOKEN: str | None = None
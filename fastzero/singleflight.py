@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from fastzero.metrics import registry
+from fastzero.settings import Settings
+
+settings = Settings()
+
+CALLS = registry.counter(
+    'fastzero_singleflight_calls_total',
+    'Single-flight calls by flight and whether they ran or shared a call.',
+    ('flight', 'result'),
+)
+
+
+class Flight:
+    __slots__ = ('expires_at', 'future')
+
+    def __init__(self, future: asyncio.Future, expires_at: float):
+        self.future = future
+        self.expires_at = expires_at
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    The first caller for a key runs the call. Callers arriving within
+    `max_age` seconds of its start share its result, or its exception,
+    whether it is still running or has just finished, so a shared result
+    is never older than that. Failed calls are not shared after they end.
+
+    Results cross requests, so calls return serialized responses rather
+    than session-bound objects. Coalescing is per process.
+    """
+
+    def __init__(self, name: str, max_age: float):
+        self.name = name
+        self.max_age = max_age
+        self.leaders = CALLS.labels(name, 'leader')
+        self.shared = CALLS.labels(name, 'shared')
+        # in start order, which with a fixed max_age is also expiry order
+        self._flights: OrderedDict[Hashable, Flight] = OrderedDict()
+        registry.gauge(
+            f'fastzero_{name}_coalescing_ratio',
+            f'Share of {name} calls served by another in-flight call.',
+            self.ratio,
+        )
+
+    def ratio(self):
+        total = self.leaders.value + self.shared.value
+        return self.shared.value / total if total else 0.0
+
+    def forget(self, key: Hashable):
+        """
+        Stop new callers joining the call for `key`, after a write it may
+        not have seen.
+        """
+        self._flights.pop(key, None)
+
+    def _drop(self, key: Hashable, flight: Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _prune(self, now: float):
+        while self._flights:
+            key, flight = next(iter(self._flights.items()))
+            if flight.expires_at > now:
+                break
+            del self._flights[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        now = time.monotonic()
+        self._prune(now)
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.shared.inc()
+            try:
+                return await asyncio.shield(flight.future)
+            except asyncio.CancelledError:
+                if not flight.future.cancelled():
+                    raise
+                # the leader was cancelled, not us: run the call ourselves
+
+        self.leaders.inc()
+        flight = Flight(
+            asyncio.get_running_loop().create_future(), now + self.max_age
+        )
+        self._flights[key] = flight
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._drop(key, flight)
+            flight.future.cancel()
+            raise
+        except Exception as exc:
+            self._drop(key, flight)
+            flight.future.set_exception(exc)
+            # mark it retrieved, there may be no one else waiting for it
+            flight.future.exception()
+            raise
+
+        flight.future.set_result(result)
+        return result
+
+
+todo_list_flights = SingleFlight('todo_list', settings.SINGLE_FLIGHT_MAX_AGE)
+user_flights = SingleFlight('user_read', settings.SINGLE_FLIGHT_MAX_AGE)
@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import logging
+from datetime import timedelta
+
+from sqlalchemy import delete, exc, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from fastzero.database import engine
+from fastzero.list_cache import todo_list_cache
+from fastzero.metrics import registry
+from fastzero.models import Todo
+from fastzero.settings import Settings
+
+settings = Settings()
+
+logger = logging.getLogger(__name__)
+
+PURGED = registry.counter(
+    'fastzero_trash_purged_total', 'Trashed todos deleted by the purge worker.'
+).labels()
+
+
+class TrashPurger:
+    """
+    Background worker deleting todos trashed more than `retention` ago.
+
+    Each batch deletes at most `batch_size` of the oldest expired rows in
+    its own short transaction, skipping rows a request holds locked, and
+    batches run at most `rate` rows per second so foreground traffic keeps
+    the database. When nothing has expired it checks again every
+    `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        retention: timedelta,
+        batch_size: int,
+        rate: float,
+        interval: float,
+    ):
+        self.engine = engine
+        self.retention = retention
+        self.batch_size = batch_size
+        self.rate = rate
+        self.interval = interval
+        self._task = None
+
+    async def purge_batch(self):
+        expired = (
+            select(Todo.id)
+            .where(Todo.trashed_at < func.now() - self.retention)
+            .order_by(Todo.trashed_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.engine.begin() as conn:
+            user_ids = (
+                await conn.scalars(
+                    delete(Todo)
+                    .where(Todo.id.in_(expired.scalar_subquery()))
+                    .returning(Todo.user_id)
+                )
+            ).all()
+
+        # the trash is listed and counted, so its owners' lists go stale
+        for user_id in set(user_ids):
+            await todo_list_cache.invalidate(user_id)
+        PURGED.inc(len(user_ids))
+
+        return len(user_ids)
+
+    async def run(self):
+        while True:
+            try:
+                purged = await self.purge_batch()
+            except (OSError, exc.SQLAlchemyError):
+                logger.exception('trash purge failed')
+                purged = 0
+
+            if purged < self.batch_size:
+                await asyncio.sleep(self.interval)
+            else:
+                await asyncio.sleep(purged / self.rate)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+trash_purger = TrashPurger(
+    engine,
+    timedelta(seconds=settings.TRASH_RETENTION),
+    settings.TRASH_PURGE_BATCH_SIZE,
+    settings.TRASH_PURGE_RATE,
+    settings.TRASH_PURGE_INTERVAL,
+)
@@ -0,0 +1,73 @@
+import asyncio
+import itertools
+import os
+
+from fastzero.app import app
+
+
+def resident_bytes():
+    with open('/proc/self/statm', encoding='ascii') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+async def call_app(method, path, token, body=()):
+    """
+    Drive `app` over ASGI, sending the `body` chunks one message at a time.
+
+    Process RSS is sampled on every message, so buffers held by the driver
+    and socket count too. Returns the response status, the number of body
+    chunks and bytes sent back, and the peak RSS growth.
+    """
+    path, _, query = path.partition('?')
+    result = {'status': None, 'chunks': 0, 'bytes': 0, 'rss_growth': 0}
+    baseline = resident_bytes()
+    requests = itertools.chain(
+        (
+            {'type': 'http.request', 'body': chunk, 'more_body': True}
+            for chunk in body
+        ),
+        [{'type': 'http.request', 'body': b''}],
+    )
+    done = asyncio.Event()
+
+    def sample():
+        growth = resident_bytes() - baseline
+        result['rss_growth'] = max(result['rss_growth'], growth)
+
+    async def receive():
+        # the request body, then nothing until the response is complete
+        sample()
+        message = next(requests, None)
+        if message is None:
+            await done.wait()
+            return {'type': 'http.disconnect'}
+        return message
+
+    async def send(message):
+        sample()
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            result['chunks'] += 1
+            result['bytes'] += len(message['body'])
+            if not message.get('more_body'):
+                done.set()
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'authorization', f'Bearer {token}'.encode())],
+        'client': ('test', 1),
+        'server': ('test', 80),
+    }
+
+    await app(scope, receive, send)
+
+    return result
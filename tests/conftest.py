@@ -1,19 +1,43 @@
+from collections import OrderedDict
 from contextlib import contextmanager
 from datetime import datetime
 
 import factory
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import Session
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
 
 # from sqlalchemy.pool import StaticPool
 from testcontainers.postgres import PostgresContainer
 
+from fastzero import ratelimit, security
 from fastzero.app import app
-from fastzero.database import get_session
+from fastzero.cache import LocalCache
+from fastzero.database import PrimarySession, get_session
+from fastzero.list_cache import todo_list_cache
 from fastzero.models import User, table_registry
+from fastzero.profiling import capture
 from fastzero.security import get_password_hash
+from fastzero.singleflight import todo_list_flights, user_flights
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--runslow', action='store_true', help='run tests marked slow'
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--runslow'):
+        return
+
+    skip = pytest.mark.skip(reason='needs --runslow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
 
 
 @pytest.fixture
@@ -28,28 +52,117 @@ def client(session):
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
-def session(engine):
+@pytest_asyncio.fixture
+async def async_client(session):
+    """Client for concurrent requests, all served on the test session."""
+    app.dependency_overrides[get_session] = lambda: session
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as client:
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def principal_cache(request, monkeypatch):
+    """
+    A fresh principal cache; parametrize it indirectly with a backend
+    class to use another one.
+    """
+    cache = getattr(request, 'param', LocalCache)()
+    monkeypatch.setattr(security, 'principal_cache', cache)
+
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def rate_limit_store(monkeypatch):
+    store = ratelimit.LocalRateLimitStore()
+    monkeypatch.setattr(ratelimit, 'rate_limit_store', store)
+
+    return store
+
+
+@pytest.fixture(autouse=True)
+def no_trash_purge(monkeypatch):
+    # the worker would run against DATABASE_URL, not the test database
+    monkeypatch.setattr('fastzero.app.settings.TRASH_PURGE_ENABLED', False)
+
+
+@pytest.fixture(autouse=True)
+def flights(monkeypatch):
+    for flight in (todo_list_flights, user_flights):
+        monkeypatch.setattr(flight, '_flights', OrderedDict())
+
+
+@pytest.fixture(autouse=True)
+def list_cache(monkeypatch):
+    cache = LocalCache()
+    monkeypatch.setattr(todo_list_cache, 'backend', cache)
+
+    return cache
+
+
+@pytest_asyncio.fixture
+async def session(engine):
     # engine = create_engine(
     #     'sqlite:///:memory:',
     #     connect_args={'check_same_thread': False},
     #     poolclass=StaticPool,
     # )
-    table_registry.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
 
-    with Session(engine) as session:
+    async with PrimarySession(engine, expire_on_commit=False) as session:
         yield session
 
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
 
 
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
-        _engine = create_engine(postgres.get_connection_url())
+        _engine = create_async_engine(postgres.get_connection_url())
 
-        with _engine.begin():
-            yield _engine
+        yield _engine
+
+
+@pytest.fixture
+def query_budget(engine):
+    """
+    Fail if the block runs more than `max_queries` statements or repeats a
+    statement shape, which is how an N+1 load shows up.
+    """
+
+    @contextmanager
+    def budget(max_queries):
+        with capture(engine.sync_engine) as profile:
+            yield profile
+
+        assert len(profile.queries) <= max_queries, profile.report()
+        assert not profile.repeated(), profile.report()
+
+    return budget
+
+
+@pytest.fixture
+def sql_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+    yield statements
+
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
 
 
 @contextmanager
@@ -73,30 +186,55 @@ def mock_db_time():
     return _mock_db_time
 
 
-@pytest.fixture
-def user(session):
+@pytest_asyncio.fixture
+async def user(session):
     password = 'pass'
     user = UserFactory(password=get_password_hash(password))
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password
     return user
 
 
-@pytest.fixture
-def other_user(session):
+@pytest_asyncio.fixture
+async def other_user(session):
     password = 'pass'
     user = UserFactory(password=get_password_hash(password))
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password
     return user
 
 
+@pytest.fixture
+def internal_headers(monkeypatch):
+    monkeypatch.setattr(
+        'fastzero.security.settings.INTERNAL_TOKEN', 'internal-secret'
+    )
+    return {'Authorization': 'Bearer internal-secret'}
+
+
+@pytest_asyncio.fixture
+async def cached_user(user, principal_cache):
+    """
+    `user` with its token version and row cached as the first
+    authenticated request leaves them, so the next one is served from
+    `principal_cache`.
+    """
+    await principal_cache.set(
+        f'token_version:{user.id}', user.token_version, 60
+    )
+    await principal_cache.set(
+        f'principal:{user.id}', security._user_to_cache(user), 60
+    )
+
+    return user
+
+
 @pytest.fixture
 def token(client, user):
     resp = client.post(
@@ -0,0 +1,42 @@
+import asyncio
+import pickle
+import time
+
+from fastzero.cache import LocalCache
+from fastzero.ratelimit import take_token
+
+
+class PickleCache(LocalCache):
+    """Fake shared backend: values only survive as serialized bytes."""
+
+    async def get(self, key):
+        value = await super().get(key)
+        return pickle.loads(value) if value else None
+
+    async def set(self, key, value, ttl):
+        await super().set(key, pickle.dumps(value), ttl)
+
+
+class SharedRateLimitStore:
+    """
+    Fake shared rate limit store: instances built on the same `buckets`
+    dict act as workers sharing one server, which keeps bucket state only
+    as serialized bytes and runs each `take` atomically.
+    """
+
+    def __init__(self, buckets: dict, lock: asyncio.Lock):
+        self.buckets = buckets
+        self.lock = lock
+
+    async def take(self, key, rate, capacity):
+        async with self.lock:
+            stored = self.buckets.get(key)
+            bucket, wait = take_token(
+                pickle.loads(stored) if stored else None,
+                time.monotonic(),
+                rate,
+                capacity,
+            )
+            self.buckets[key] = pickle.dumps(bucket)
+
+        return wait
@@ -0,0 +1,67 @@
+import pytest
+from freezegun import freeze_time
+
+from fastzero.cache import LocalCache, sizeof
+
+
+@pytest.mark.asyncio
+async def test_local_cache_get_set_delete():
+    cache = LocalCache()
+
+    await cache.set('key', {'value': 1}, ttl=10)
+    assert await cache.get('key') == {'value': 1}
+
+    await cache.delete('key')
+    assert await cache.get('key') is None
+
+
+@pytest.mark.asyncio
+async def test_local_cache_expires_entries():
+    cache = LocalCache()
+
+    with freeze_time('2024-01-01 12:00:00') as frozen:
+        await cache.set('key', 'value', ttl=10)
+        frozen.tick(11)
+
+        assert await cache.get('key') is None
+        assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_cache_ignores_non_positive_ttl():
+    cache = LocalCache()
+
+    await cache.set('key', 'value', ttl=0)
+
+    assert await cache.get('key') is None
+
+
+@pytest.mark.asyncio
+async def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2)
+
+    await cache.set('a', 'first', ttl=10)
+    await cache.set('b', 'second', ttl=10)
+    await cache.get('a')
+    await cache.set('c', 'third', ttl=10)
+
+    assert await cache.get('a') == 'first'
+    assert await cache.get('b') is None
+    assert await cache.get('c') == 'third'
+
+
+@pytest.mark.asyncio
+async def test_local_cache_evicts_by_size():
+    cache = LocalCache(max_bytes=sizeof('x' * 100) * 2)
+
+    await cache.set('a', 'x' * 100, ttl=10)
+    await cache.set('b', 'x' * 100, ttl=10)
+    await cache.set('c', 'x' * 100, ttl=10)
+
+    assert await cache.get('a') is None
+    assert await cache.get('c') == 'x' * 100
+    assert cache.size <= cache.max_bytes
+
+    await cache.delete('b')
+    await cache.delete('c')
+    assert cache.size == 0
@@ -0,0 +1,150 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from testcontainers.postgres import PostgresContainer
+
+from fastzero import database
+from fastzero.cache import LocalCache
+from fastzero.database import ReplicaSet, create_instrumented_engine
+from fastzero.models import Todo, table_registry
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics(engine):
+    pool_engine = create_instrumented_engine(
+        engine.url.render_as_string(hide_password=False),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    metrics = pool_engine.pool.metrics
+
+    async with pool_engine.connect():
+        snapshot = metrics.snapshot(pool_engine.pool)
+        with pytest.raises(exc.TimeoutError):
+            await pool_engine.connect()
+
+    await pool_engine.dispose()
+
+    expected_waits = 2
+    assert snapshot['checked_out'] == 1
+    assert metrics.timeouts == 1
+    assert metrics.wait.count == expected_waits
+    assert metrics.connection_age.count == 1
+    assert pool_engine.pool.metrics is metrics
+
+
+def test_pool_stats(client, internal_headers):
+    resp = client.get('/internal/pool', headers=internal_headers)
+
+    assert resp.status_code == HTTPStatus.OK
+    assert {'size', 'checked_out', 'timeouts', 'wait', 'connection_age'} <= (
+        resp.json().keys()
+    )
+
+
+@pytest.fixture(scope='module')
+def replica_url():
+    with PostgresContainer('postgres:16', driver='psycopg') as postgres:
+        yield postgres.get_connection_url()
+
+
+@pytest_asyncio.fixture
+async def replica(replica_url, monkeypatch):
+    """
+    A second, empty database standing in for a replica: rows written
+    through the app's primary never show up here.
+    """
+    replica_engine = create_async_engine(replica_url)
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    replicas = ReplicaSet([replica_engine], 60, 1)
+    await replicas.check()
+    monkeypatch.setattr(database, 'replicas', replicas)
+    monkeypatch.setattr(database, 'recent_writes', LocalCache())
+
+    yield replica_engine
+
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+    await replica_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(session, client, user, token, replica):
+    session.add(Todo(title='t', description='d', state='todo', user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    todos = client.get('/todos/', headers=headers)
+    read_user = client.get(f'/users/{user.id}')
+
+    assert todos.json()['todos'] == []
+    assert read_user.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_read_your_writes(client, token, replica):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    created = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 't', 'description': 'd', 'state': 'todo'},
+    )
+    todos = client.get('/todos/', headers=headers)
+
+    assert [todo['id'] for todo in todos.json()['todos']] == [
+        created.json()['id']
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_falls_back_to_primary(
+    session, client, user, token, monkeypatch
+):
+    down = create_async_engine('postgresql+psycopg://u:p@127.0.0.1:1/db')
+    replicas = ReplicaSet([down], 60, 1)
+    await replicas.check()
+    monkeypatch.setattr(database, 'replicas', replicas)
+    session.add(Todo(title='t', description='d', state='todo', user_id=user.id))
+    await session.commit()
+
+    resp = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    assert len(resp.json()['todos']) == 1
+    assert replicas.healthy == []
+
+
+@pytest.mark.asyncio
+async def test_replica_round_robin(replica_url):
+    engines = [create_async_engine(replica_url) for _ in range(2)]
+    replicas = ReplicaSet(engines, 60, 1)
+    await replicas.check()
+
+    picked = [replicas.pick() for _ in range(4)]
+
+    assert picked == engines * 2
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replica_checks_run_in_background(replica_url):
+    engine = create_async_engine(replica_url)
+    replicas = ReplicaSet([engine], 0.01, 1)
+
+    assert replicas.pick() is None
+
+    replicas.start()
+    async with asyncio.timeout(5):
+        while not replicas.healthy:
+            await asyncio.sleep(0.01)
+    await replicas.stop()
+
+    assert replicas.pick() is engine
+    await engine.dispose()
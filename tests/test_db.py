@@ -1,23 +1,52 @@
 from dataclasses import asdict
+from functools import partial
 
-from sqlalchemy import select
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import selectinload
 
 from fastzero.models import Todo, TodoState, User
 
+SEED_USERS = text("""
+    INSERT INTO users (username, email, password)
+    SELECT 'seed' || g, 'seed' || g || '@test.com', 'secret'
+    FROM generate_series(1, 99) AS g
+""")
 
-def test_create_user(session, mock_db_time):
+SEED_TODOS = text("""
+    INSERT INTO todos (title, description, state, user_id)
+    SELECT 'todo ' || g, 'test',
+           (ARRAY['draft', 'todo', 'doing', 'done'])[1 + g % 4]::todostate,
+           u.id
+    FROM users AS u, generate_series(1, 100) AS g
+""")
+
+USER_INDEXES = (
+    'ix_todos_user_id_created_at_id',
+    'ix_todos_user_id_state_created_at_id',
+)
+
+
+@pytest.mark.asyncio
+async def test_create_user(session, mock_db_time):
     with mock_db_time(model=User) as time:
         new_user = User(username='test', password='pass', email='test@test.com')
         session.add(new_user)
-        session.commit()
+        await session.commit()
 
-    user = session.scalar(select(User).where(User.username == 'test'))
+    user = await session.scalar(
+        select(User)
+        .options(selectinload(User.todos))
+        .where(User.username == 'test')
+    )
 
     expected = {
         'id': 1,
         'username': 'test',
         'password': 'pass',
         'email': 'test@test.com',
+        'token_version': 0,
         'todos': [],
         'created_at': time,
         'updated_at': time,
@@ -26,7 +55,8 @@ def test_create_user(session, mock_db_time):
     assert asdict(user) == expected
 
 
-def test_create_todo(session, user):
+@pytest.mark.asyncio
+async def test_create_todo(session, user):
     todo = Todo(
         title='test todo',
         description='test',
@@ -35,9 +65,87 @@ def test_create_todo(session, user):
     )
 
     session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    await session.commit()
+    await session.refresh(todo)
 
-    local_user = session.scalar(select(User).where(User.id == user.id))
+    local_user = await session.scalar(
+        select(User).options(selectinload(User.todos)).where(User.id == user.id)
+    )
 
     assert todo in local_user.todos
+
+
+@pytest_asyncio.fixture
+async def seeded_todos(session, user):
+    """
+    Enough users and todos, analyzed, for the planner to pick the plans
+    it would in production.
+    """
+    await session.execute(SEED_USERS)
+    await session.execute(SEED_TODOS)
+    await session.commit()
+    await session.execute(text('ANALYZE users, todos'))
+
+
+def capture_todo_statements(engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, *args):
+        if 'todos' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    return statements, partial(
+        event.remove, engine.sync_engine, 'before_cursor_execute', capture
+    )
+
+
+async def explain(session, statement, parameters):
+    conn = await session.connection()
+    plan = await conn.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+    return '\n'.join(plan.scalars())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'path',
+    [
+        '/todos/',
+        '/todos/?with_total=true',
+        '/todos/?state=done',
+        '/todos/?state=trash',
+        '/todos/stats',
+    ],
+)
+async def test_todo_list_routes_use_indexes(  # noqa: PLR0913, PLR0917
+    session, engine, client, token, seeded_todos, path
+):
+    statements, stop = capture_todo_statements(engine)
+    client.get(path, headers={'Authorization': f'Bearer {token}'})
+    stop()
+
+    assert statements
+    for statement, parameters in statements:
+        plan = await explain(session, statement, parameters)
+        assert any(index in plan for index in USER_INDEXES), plan
+
+
+@pytest.mark.asyncio
+async def test_todo_item_routes_use_indexes(  # noqa: PLR0913, PLR0917
+    session, engine, client, user, token, seeded_todos
+):
+    todo_id = await session.scalar(
+        select(Todo.id).where(Todo.user_id == user.id).limit(1)
+    )
+    headers = {'Authorization': f'Bearer {token}'}
+
+    statements, stop = capture_todo_statements(engine)
+    client.get(f'/todos/{todo_id}', headers=headers)
+    client.patch(f'/todos/{todo_id}', headers=headers, json={'title': 'x'})
+    client.delete(f'/todos/{todo_id}', headers=headers)
+    stop()
+
+    assert statements
+    for statement, parameters in statements:
+        plan = await explain(session, statement, parameters)
+        assert 'Seq Scan' not in plan, statement
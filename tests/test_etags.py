@@ -0,0 +1,40 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from fastzero.etags import check_if_match, etag_matches, make_etag
+
+
+def test_make_etag_is_strong_and_stable():
+    etag = make_etag('todo', 1, '2024-01-01T00:00:00')
+
+    assert etag.startswith('"')
+    assert etag.endswith('"')
+    assert etag == make_etag('todo', 1, '2024-01-01T00:00:00')
+    assert etag != make_etag('todo', 2, '2024-01-01T00:00:00')
+
+
+@pytest.mark.parametrize(
+    ('header', 'matches'),
+    [
+        (None, False),
+        ('*', True),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc"', True),
+        ('"xyz"', False),
+    ],
+)
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+
+def test_check_if_match_uses_strong_comparison():
+    check_if_match(None, '"abc"')
+    check_if_match('"abc"', '"abc"')
+
+    with pytest.raises(HTTPException) as exc_info:
+        check_if_match('W/"abc"', '"abc"')
+
+    assert exc_info.value.status_code == HTTPStatus.PRECONDITION_FAILED
@@ -0,0 +1,38 @@
+from http import HTTPStatus
+
+import pytest
+
+from fastzero.hashing import hasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_password():
+    hashed = await hasher.hash('secret')
+
+    assert hashed != 'secret'
+    assert await hasher.verify('secret', hashed)
+    assert not await hasher.verify('wrong', hashed)
+    assert hasher.pending == 0
+
+
+def test_hasher_queue_full_returns_503(client, monkeypatch):
+    monkeypatch.setattr(hasher, 'pending', hasher.workers + hasher.queue_size)
+
+    resp = client.post(
+        '/users/',
+        json={'username': 'test', 'email': 'test@test.com', 'password': 'x'},
+    )
+
+    assert resp.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert resp.headers['Retry-After'] == '1'
+    assert resp.json() == {'detail': 'server busy, try again later'}
+
+
+def test_hashing_stats(client, user, token, internal_headers):
+    resp = client.get('/internal/hashing', headers=internal_headers)
+    data = resp.json()
+
+    assert resp.status_code == HTTPStatus.OK
+    assert data['workers'] == hasher.workers
+    assert data['queue_depth'] == 0
+    assert data['latency']['count'] >= 1
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+from fastzero.metrics import (
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    Registry,
+)
+
+
+def test_registry_render():
+    registry = Registry()
+    requests = registry.histogram(
+        'requests_seconds', 'Latency.', ('route',), buckets=(0.1, 1)
+    )
+    requests.labels('/a"b').observe(0.5)
+    registry.counter('hits_total', 'Hits.').labels().inc(2)
+    registry.gauge('depth', 'Depth.', lambda: 3)
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE requests_seconds histogram' in lines
+    assert 'requests_seconds_bucket{route="/a\\"b",le="0.1"} 0' in lines
+    assert 'requests_seconds_bucket{route="/a\\"b",le="1"} 1' in lines
+    assert 'requests_seconds_bucket{route="/a\\"b",le="+Inf"} 1' in lines
+    assert 'requests_seconds_count{route="/a\\"b"} 1' in lines
+    assert 'hits_total 2' in lines
+    assert 'depth 3' in lines
+
+
+def test_middleware_records_route_template(client, user, token):
+    latency = REQUEST_DURATION.labels('GET', '/users/{user_id}', 200)
+    queries = REQUEST_DB_QUERIES.labels('GET', '/users/{user_id}')
+    count, total_queries = latency.count, queries.sum
+
+    resp = client.get(f'/users/{user.id}')
+
+    assert resp.status_code == HTTPStatus.OK
+    assert latency.count == count + 1
+    assert queries.sum == total_queries + 1
+
+
+def test_middleware_unmatched_route(client):
+    latency = REQUEST_DURATION.labels('GET', 'unmatched', 404)
+    count = latency.count
+
+    client.get('/does/not/exist')
+
+    assert latency.count == count + 1
+
+
+def test_metrics_endpoint(client, internal_headers):
+    client.get('/users/')
+
+    resp = client.get('/metrics', headers=internal_headers)
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers['content-type'].startswith('text/plain')
+    assert (
+        'fastzero_http_request_duration_seconds_count'
+        '{method="GET",route="/users/",status="200"}'
+    ) in resp.text
+    assert '# TYPE fastzero_db_pool_wait_seconds histogram' in resp.text
+    assert 'fastzero_password_hash_pending 0' in resp.text
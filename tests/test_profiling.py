@@ -0,0 +1,73 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import exc, select, text
+
+from fastzero import profiling
+from fastzero.models import User
+from fastzero.profiling import capture, statement_shape
+
+
+def test_statement_shape_collapses_in_lists():
+    one = 'SELECT *\n  FROM todos WHERE id IN (%(id_1_1)s)'
+    many = 'SELECT * FROM todos WHERE id IN (%(id_1_1)s, %(id_1_2)s)'
+
+    assert statement_shape(many) == 'SELECT * FROM todos WHERE id IN (...)'
+    assert statement_shape(one) == 'SELECT * FROM todos WHERE id IN (...)'
+
+
+@pytest.mark.asyncio
+async def test_capture_flags_repeated_shapes(session, engine, user):
+    with capture(engine.sync_engine, repeat_threshold=3) as profile:
+        for _ in range(3):
+            await session.scalar(select(User).where(User.id == user.id))
+
+    expected = 3
+    assert len(profile.queries) == expected
+    assert list(profile.repeated().values()) == [expected]
+    assert profile.queries[0].parameters == {'id_1': user.id}
+
+
+def test_profile_header_opt_in(client, user, monkeypatch):
+    monkeypatch.setattr(profiling.settings, 'SQL_PROFILE_HEADER', True)
+
+    profiled = client.get(f'/users/{user.id}', headers={'X-SQL-Profile': '1'})
+    plain = client.get(f'/users/{user.id}')
+
+    assert plain.status_code == HTTPStatus.OK
+    assert 'X-SQL-Profile' not in plain.headers
+    assert profiled.headers['X-SQL-Profile'].startswith('queries=1;')
+
+
+def test_profile_header_ignored_unless_allowed(client, user):
+    resp = client.get(f'/users/{user.id}', headers={'X-SQL-Profile': '1'})
+
+    assert 'X-SQL-Profile' not in resp.headers
+
+
+def test_profile_logs_slow_queries(client, user, monkeypatch, caplog):
+    monkeypatch.setattr(profiling.settings, 'SQL_PROFILE', True)
+    monkeypatch.setattr(profiling.settings, 'SQL_SLOW_QUERY_MS', 0)
+
+    with caplog.at_level(logging.INFO, logger='fastzero.profiling'):
+        resp = client.get(f'/users/{user.id}')
+
+    assert resp.headers['X-SQL-Profile'].endswith('slow=1')
+    assert caplog.records[0].levelno == logging.WARNING
+    assert f"params={{'id_1': {user.id}" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_failed_statements_leave_no_timers(engine):
+    with capture(engine.sync_engine) as profile:
+        async with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(exc.ProgrammingError):
+                    await conn.execute(text('SELECT * FROM missing'))
+                await conn.rollback()
+            await conn.execute(text('SELECT 1'))
+
+            assert not conn.info.get('query_start')
+
+    assert [query.statement for query in profile.queries] == ['SELECT 1']
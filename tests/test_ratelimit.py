@@ -0,0 +1,120 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from freezegun import freeze_time
+
+from fastzero.hashing import hasher
+from fastzero.ratelimit import LocalRateLimitStore, parse_rate, settings
+from tests.fakes import SharedRateLimitStore
+
+
+def test_parse_rate():
+    assert parse_rate('30/minute') == (0.5, 30)
+
+
+@pytest.mark.asyncio
+async def test_local_store_refills_over_time():
+    store = LocalRateLimitStore()
+    rate, capacity = parse_rate('2/second')
+
+    with freeze_time('2024-01-01 12:00:00') as frozen:
+        assert await store.take('key', rate, capacity) == 0
+        assert await store.take('key', rate, capacity) == 0
+        assert await store.take('key', rate, capacity) == pytest.approx(0.5)
+
+        frozen.tick(0.5)
+        assert await store.take('key', rate, capacity) == 0
+
+
+@pytest.mark.asyncio
+async def test_local_store_evicts_least_recently_used():
+    store = LocalRateLimitStore(max_keys=2)
+
+    for key in ('a', 'b', 'a', 'c'):
+        await store.take(key, 1, 1)
+
+    expected = 2
+    assert len(store) == expected
+    assert await store.take('a', 1, 1) > 0
+    assert await store.take('b', 1, 1) == 0
+
+
+@pytest.mark.asyncio
+async def test_shared_store_limits_across_workers():
+    buckets = {}
+    lock = asyncio.Lock()
+    workers = [SharedRateLimitStore(buckets, lock) for _ in range(3)]
+
+    with freeze_time('2024-01-01 12:00:00'):
+        waits = [await worker.take('key', 1, 2) for worker in workers]
+
+    assert waits == [0, 0, pytest.approx(1)]
+
+
+def test_login_rate_limited_before_hashing(client, user, monkeypatch):
+    monkeypatch.setitem(settings.RATE_LIMITS, 'auth_token:ip', '2/minute')
+    verified = []
+
+    async def verify(*args):
+        verified.append(args)
+        return False
+
+    monkeypatch.setattr(hasher, 'verify', verify)
+
+    responses = [
+        client.post(
+            '/auth/token',
+            data={'username': user.username, 'password': 'wrong'},
+        )
+        for _ in range(3)
+    ]
+
+    assert [resp.status_code for resp in responses] == [
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.BAD_REQUEST,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
+    assert responses[-1].json() == {'detail': 'too many requests'}
+    assert responses[-1].headers['Retry-After'] == '30'
+    assert len(verified) == len(responses) - 1
+
+
+def test_login_rate_limited_per_username(client, user, other_user, monkeypatch):
+    monkeypatch.setitem(settings.RATE_LIMITS, 'auth_token:username', '1/hour')
+
+    def login(username):
+        return client.post(
+            '/auth/token', data={'username': username, 'password': 'wrong'}
+        ).status_code
+
+    assert login(user.username) == HTTPStatus.BAD_REQUEST
+    assert login(user.username) == HTTPStatus.TOO_MANY_REQUESTS
+    assert login(other_user.username) == HTTPStatus.BAD_REQUEST
+
+
+def test_todos_rate_limited_per_user(client, token, monkeypatch):
+    monkeypatch.setitem(settings.RATE_LIMITS, 'todos:user', '1/minute')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get('/todos/', headers=headers)
+    second = client.get('/todos/', headers=headers)
+
+    assert first.status_code == HTTPStatus.OK
+    assert second.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert second.headers['Retry-After'] == '60'
+
+
+def test_unconfigured_limits_are_not_enforced(
+    client, token, rate_limit_store, monkeypatch
+):
+    monkeypatch.setattr(settings, 'RATE_LIMITS', {})
+    buckets = len(rate_limit_store)
+
+    for _ in range(3):
+        resp = client.get(
+            '/todos/', headers={'Authorization': f'Bearer {token}'}
+        )
+        assert resp.status_code == HTTPStatus.OK
+
+    assert len(rate_limit_store) == buckets
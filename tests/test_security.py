@@ -1,8 +1,18 @@
+import time
 from http import HTTPStatus
 
+import pytest
+from freezegun import freeze_time
 from jwt import decode
 
-from fastzero.security import create_access_token, settings
+from fastzero import security
+from fastzero.schemas import Principal
+from fastzero.security import (
+    access_token_claims,
+    create_access_token,
+    settings,
+)
+from tests.fakes import PickleCache
 
 
 def test_jwt():
@@ -23,3 +33,177 @@ def test_jwt_invalid_token(client):
 
     assert resp.status_code == HTTPStatus.UNAUTHORIZED
     assert resp.json() == {'detail': 'could not validate credentials'}
+
+
+@pytest.mark.asyncio
+async def test_principal_uses_token_claims_only(
+    client, user, token, principal_cache
+):
+    resp = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    assert resp.status_code == HTTPStatus.OK
+    assert await principal_cache.get(f'token_version:{user.id}') == 0
+    assert await principal_cache.get(f'principal:{user.id}') is None
+
+
+def test_token_without_user_id_claim(client):
+    token = create_access_token({'sub': 'test'})
+
+    resp = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+    assert resp.json() == {'detail': 'could not validate credentials'}
+
+
+def test_token_with_stale_version(client, user):
+    token = create_access_token({
+        'sub': user.username,
+        'uid': user.id,
+        'ver': user.token_version + 1,
+    })
+
+    resp = client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached(session, user, principal_cache):
+    principal = Principal(
+        id=user.id,
+        username=user.username,
+        token_version=user.token_version,
+        expires_at=int(time.time()) + 60,
+    )
+
+    await security.get_current_user(session, principal)
+    cached = await principal_cache.get(f'principal:{user.id}')
+
+    assert cached['id'] == user.id
+    assert 'password' not in cached
+
+
+def test_current_user_from_cache_can_be_updated(client, cached_user, token):
+    resp = client.put(
+        f'/users/{cached_user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'bob', 'email': 'bob@test.com', 'password': 'new'},
+    )
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == {
+        'id': cached_user.id,
+        'username': 'bob',
+        'email': 'bob@test.com',
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_user_bumps_token_version_in_sql(
+    session, client, user, principal_cache
+):
+    # cached before another worker bumped the version: the entry is stale
+    await principal_cache.set(
+        f'principal:{user.id}', security._user_to_cache(user), 60
+    )
+    user.token_version = 1
+    await session.commit()
+    token = create_access_token(access_token_claims(user))
+
+    resp = client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'bob', 'email': 'bob@test.com', 'password': 'new'},
+    )
+    await session.refresh(user)
+
+    expected = 2
+    assert resp.status_code == HTTPStatus.OK
+    assert user.token_version == expected
+
+
+@pytest.mark.asyncio
+async def test_update_user_revokes_tokens(client, user, token, principal_cache):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={'username': 'bob', 'email': 'bob@test.com', 'password': 'new'},
+    )
+
+    assert await principal_cache.get(f'principal:{user.id}') is None
+    assert await principal_cache.get(f'token_version:{user.id}') is None
+
+    resp = client.get('/todos/', headers=headers)
+
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_delete_user_revokes_tokens(client, user, token, principal_cache):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.delete(f'/users/{user.id}', headers=headers)
+
+    assert await principal_cache.get(f'principal:{user.id}') is None
+    assert await principal_cache.get(f'token_version:{user.id}') is None
+
+    resp = client.get('/todos/', headers=headers)
+
+    assert resp.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_principal_ttl_is_bounded_by_token_exp(
+    client, user, principal_cache, monkeypatch
+):
+    monkeypatch.setattr(settings, 'PRINCIPAL_CACHE_TTL', 24 * 60 * 60)
+
+    with freeze_time('2024-01-01 12:00:00'):
+        token = client.post(
+            '/auth/token',
+            data={'username': user.username, 'password': user.clean_password},
+        ).json()['access_token']
+        client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+
+    with freeze_time('2024-01-01 12:31:00'):
+        version = await principal_cache.get(f'token_version:{user.id}')
+
+    assert version is None
+
+
+@pytest.mark.parametrize('principal_cache', [PickleCache], indirect=True)
+def test_principal_cache_with_shared_backend(client, cached_user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    todos = client.get('/todos/', headers=headers)
+    updated = client.put(
+        f'/users/{cached_user.id}',
+        headers=headers,
+        json={'username': 'bob', 'email': 'bob@test.com', 'password': 'new'},
+    )
+
+    assert todos.status_code == HTTPStatus.OK
+    assert updated.status_code == HTTPStatus.OK
+
+
+INTERNAL_PATHS = ['/internal/pool', '/internal/hashing', '/metrics']
+
+
+@pytest.mark.parametrize('path', INTERNAL_PATHS)
+def test_internal_endpoints_not_served_without_token_setting(client, path):
+    assert client.get(path).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize('path', INTERNAL_PATHS)
+def test_internal_endpoints_require_internal_token(
+    client, token, internal_headers, path
+):
+    anonymous = client.get(path)
+    user = client.get(path, headers={'Authorization': f'Bearer {token}'})
+    internal = client.get(path, headers=internal_headers)
+
+    assert anonymous.status_code == HTTPStatus.UNAUTHORIZED
+    assert user.status_code == HTTPStatus.UNAUTHORIZED
+    assert internal.status_code == HTTPStatus.OK
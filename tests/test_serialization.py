@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import TypeAdapter
+
+from fastzero.models import TodoState
+from fastzero.schemas import TodoList, TodoPublic
+from fastzero.serialization import read_csv, read_lines, row_type
+
+
+def test_row_type_matches_schema_serialization():
+    todo = {
+        'title': 'title',
+        'description': 'description',
+        'state': TodoState.doing,
+        'id': 1,
+        'created_at': datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        'updated_at': datetime(2024, 1, 2, 12, tzinfo=timezone.utc),
+    }
+    payload = {'todos': [todo], 'next_cursor': 'abc', 'total': 7}
+    adapter = TypeAdapter(row_type(TodoList, todos=list[row_type(TodoPublic)]))
+
+    assert adapter.dump_json(payload) == (
+        TodoList.model_validate(payload).model_dump_json().encode()
+    )
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_read_csv_across_chunks():
+    # chunk boundaries inside a line, a character and a quoted field
+    body = chunked(b'title,state\nca', b'f\xc3', b'\xa9,"to\r\n', b'do"\n\n')
+
+    records = [
+        record
+        async for record in read_csv(read_lines(body, max_length=100), 100)
+    ]
+
+    assert records == [(2, {'title': 'café', 'state': 'to\r\ndo'})]
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from fastzero.singleflight import SingleFlight
+
+
+class Call:
+    """An awaitable call that counts its runs and waits to be released."""
+
+    def __init__(self, result='result'):
+        self.result = result
+        self.runs = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    flights = SingleFlight('test_shared', max_age=10)
+    call = Call()
+
+    tasks = [asyncio.create_task(flights.do('key', call)) for _ in range(5)]
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await asyncio.gather(*tasks) == ['result'] * 5
+    assert call.runs == 1
+    assert flights.ratio() == pytest.approx(0.8)
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared():
+    flights = SingleFlight('test_error', max_age=10)
+    call = Call(result=ValueError('boom'))
+
+    tasks = [asyncio.create_task(flights.do('key', call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    call.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert [str(result) for result in results] == ['boom', 'boom']
+    assert call.runs == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_flight_is_not_joined():
+    flights = SingleFlight('test_expired', max_age=0)
+    call = Call()
+
+    tasks = [asyncio.create_task(flights.do('key', call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    call.release.set()
+    await asyncio.gather(*tasks)
+
+    expected = 2
+    assert call.runs == expected
+
+
+@pytest.mark.asyncio
+async def test_forgotten_flight_is_not_joined():
+    flights = SingleFlight('test_forget', max_age=10)
+    call = Call()
+
+    leader = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+    flights.forget('key')
+    follower = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+    call.release.set()
+    await asyncio.gather(leader, follower)
+
+    expected = 2
+    assert call.runs == expected
+
+
+@pytest.mark.asyncio
+async def test_follower_runs_call_when_leader_is_cancelled():
+    flights = SingleFlight('test_cancel', max_age=10)
+    call = Call()
+
+    leader = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do('key', call))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    call.release.set()
+
+    assert await follower == 'result'
+    assert leader.cancelled()
+    expected = 2
+    assert call.runs == expected
@@ -1,9 +1,22 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import timedelta
 from http import HTTPStatus
 
 import factory.fuzzy
+import pytest
+import pytest_asyncio
 from freezegun import freeze_time
+from sqlalchemy import func, select, text, update
 
+from fastzero.list_cache import LOOKUPS, todo_list_cache
 from fastzero.models import Todo, TodoState
+from fastzero.routers.todos import EXPORT_BATCH_SIZE, settings
+from fastzero.singleflight import todo_list_flights
+from tests.asgi import call_app
+from tests.fakes import PickleCache
 
 
 class TodoFactory(factory.Factory):
@@ -46,9 +59,10 @@ def test_create_todo(client, token):
         assert data['state'] == TodoState.draft
 
 
-def test_list_todos_should_return_5_todos(session, client, user, token):
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+@pytest.mark.asyncio
+async def test_list_todos_should_return_5_todos(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     resp = client.get(
         '/todos/',
@@ -60,11 +74,12 @@ def test_list_todos_should_return_5_todos(session, client, user, token):
     assert len(resp.json()['todos']) == expected
 
 
-def test_list_todos_pagination_should_return_2_todos(
+@pytest.mark.asyncio
+async def test_list_todos_pagination_should_return_2_todos(
     session, client, user, token
 ):
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     resp = client.get(
         '/todos/?offset=1&limit=2',
@@ -76,14 +91,39 @@ def test_list_todos_pagination_should_return_2_todos(
     assert len(resp.json()['todos']) == expected
 
 
-def test_list_todos_filter_title(session, client, user, token):
-    session.bulk_save_objects(
+@pytest.mark.asyncio
+async def test_list_todos_cursor_pagination(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    pages = []
+    cursor = ''
+    while cursor is not None:
+        resp = client.get(
+            f'/todos/?limit=2&cursor={cursor}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        pages.append([todo['id'] for todo in resp.json()['todos']])
+        cursor = resp.json()['next_cursor']
+
+    ids = [todo_id for page in pages for todo_id in page]
+    expected_pages = 3
+    expected = 5
+
+    assert len(pages) == expected_pages
+    assert len(set(ids)) == expected
+    assert ids == sorted(ids)
+
+
+@pytest.mark.asyncio
+async def test_list_todos_filter_title(session, client, user, token):
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, title='Test todo')
     )
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(2, user_id=user.id, title='Special todo')
     )
-    session.commit()
+    await session.commit()
 
     resp = client.get(
         '/todos/?title=Special',
@@ -95,14 +135,15 @@ def test_list_todos_filter_title(session, client, user, token):
     assert len(resp.json()['todos']) == expected
 
 
-def test_list_todos_filter_description(session, client, user, token):
-    session.bulk_save_objects(
+@pytest.mark.asyncio
+async def test_list_todos_filter_description(session, client, user, token):
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, description='description')
     )
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(2, user_id=user.id, description='lorem ipsum')
     )
-    session.commit()
+    await session.commit()
 
     resp = client.get(
         '/todos/?description=ipsum',
@@ -114,14 +155,98 @@ def test_list_todos_filter_description(session, client, user, token):
     assert len(resp.json()['todos']) == expected
 
 
-def test_list_todos_filter_state(session, client, user, token):
-    session.bulk_save_objects(
+@pytest.mark.asyncio
+async def test_list_todos_search_ranks_matches(session, client, user, token):
+    session.add_all([
+        TodoFactory(user_id=user.id, title='groceries', description='buy milk'),
+        TodoFactory(user_id=user.id, title='Milk', description='fridge'),
+        TodoFactory(user_id=user.id, title='laundry', description='shirts'),
+    ])
+    await session.commit()
+
+    resp = client.get(
+        '/todos/?q=milk',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    data = resp.json()
+
+    assert resp.status_code == HTTPStatus.OK
+    assert [todo['title'] for todo in data['todos']] == ['Milk', 'groceries']
+    assert data['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_list_todos_with_total(session, client, user, token):
+    session.add_all(
+        TodoFactory.create_batch(3, user_id=user.id, state=TodoState.done)
+        + TodoFactory.create_batch(2, user_id=user.id, state=TodoState.draft)
+    )
+    await session.commit()
+
+    resp = client.get(
+        '/todos/?state=done&limit=1&with_total=true',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    plain = client.get(
+        '/todos/?state=done&limit=1',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    expected = 3
+
+    assert len(resp.json()['todos']) == 1
+    assert resp.json()['total'] == expected
+    assert plain.json()['total'] is None
+
+
+@pytest.mark.asyncio
+async def test_todo_stats(session, client, user, other_user, token):
+    session.add_all(
+        TodoFactory.create_batch(3, user_id=user.id, state=TodoState.done)
+        + TodoFactory.create_batch(2, user_id=user.id, state=TodoState.draft)
+        + TodoFactory.create_batch(4, user_id=other_user.id)
+    )
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.get('/todos/stats', headers=headers)
+    client.post('/todos/', headers=headers, json=TODO)
+    after_create = client.get('/todos/stats', headers=headers)
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == {
+        'total': 5,
+        'states': {'draft': 2, 'todo': 0, 'doing': 0, 'done': 3, 'trash': 0},
+    }
+    assert after_create.json()['total'] == resp.json()['total'] + 1
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_escapes_wildcards(
+    session, client, user, token
+):
+    session.add_all([
+        TodoFactory(user_id=user.id, title='100% done'),
+        TodoFactory(user_id=user.id, title='100 done'),
+    ])
+    await session.commit()
+
+    resp = client.get(
+        '/todos/?q=100%25',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [todo['title'] for todo in resp.json()['todos']] == ['100% done']
+
+
+@pytest.mark.asyncio
+async def test_list_todos_filter_state(session, client, user, token):
+    session.add_all(
         TodoFactory.create_batch(5, user_id=user.id, state=TodoState.doing)
     )
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(2, user_id=user.id, state=TodoState.done)
     )
-    session.commit()
+    await session.commit()
 
     resp = client.get(
         '/todos/?state=doing',
@@ -133,11 +258,12 @@ def test_list_todos_filter_state(session, client, user, token):
     assert len(resp.json()['todos']) == expected
 
 
-def test_patch_todo(session, client, user, token):
+@pytest.mark.asyncio
+async def test_patch_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     resp = client.patch(
         f'/todos/{todo.id}',
@@ -162,11 +288,12 @@ def test_patch_todo_not_found(client, token):
     assert resp.json() == expected
 
 
-def test_delete_todo(session, client, user, token):
+@pytest.mark.asyncio
+async def test_delete_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     resp = client.delete(
         f'/todos/{todo.id}',
@@ -179,6 +306,33 @@ def test_delete_todo(session, client, user, token):
     assert resp.json() == expected
 
 
+@pytest.mark.asyncio
+async def test_delete_todo_moves_it_to_trash(session, client, user, token):
+    todo = TodoFactory(user_id=user.id, state=TodoState.doing)
+    session.add(todo)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.delete(f'/todos/{todo.id}', headers=headers)
+    await session.refresh(todo)
+
+    assert todo.state == TodoState.trash
+    assert todo.trashed_at is not None
+    assert client.get('/todos/', headers=headers).json()['todos'] == []
+    assert [
+        listed['id']
+        for listed in client.get('/todos/?state=trash', headers=headers).json()[
+            'todos'
+        ]
+    ] == [todo.id]
+    assert client.get('/todos/stats', headers=headers).json()['total'] == 0
+    for method in ('GET', 'PATCH', 'DELETE'):
+        resp = client.request(
+            method, f'/todos/{todo.id}', headers=headers, json={}
+        )
+        assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
 def test_delete_todo_not_found(client, token):
     resp = client.delete(
         '/todos/10',
@@ -191,12 +345,13 @@ def test_delete_todo_not_found(client, token):
     assert resp.json() == expected
 
 
-def test_get_todo(session, client, user, token):
+@pytest.mark.asyncio
+async def test_get_todo(session, client, user, token):
     todo = TodoFactory(
         user_id=user.id, title='test', description='test', state=TodoState.done
     )
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     resp = client.get(
         f'/todos/{todo.id}',
@@ -221,3 +376,568 @@ def test_get_todo_not_found(client, token):
 
     assert resp.status_code == HTTPStatus.NOT_FOUND
     assert resp.json() == expected
+
+
+def test_bulk_create_todos(client, token):
+    resp = client.post(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'todos': [
+                {'title': f'todo {i}', 'description': 'test', 'state': 'todo'}
+                for i in range(3)
+            ]
+        },
+    )
+    results = resp.json()['results']
+
+    assert resp.status_code == HTTPStatus.CREATED
+    assert [r['status'] for r in results] == ['created'] * 3
+    assert [r['todo']['title'] for r in results] == [
+        'todo 0',
+        'todo 1',
+        'todo 2',
+    ]
+    assert [r['id'] for r in results] == [r['todo']['id'] for r in results]
+
+
+def test_bulk_create_todos_too_many_items(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_BULK_MAX_ITEMS', 1)
+
+    resp = client.post(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'todos': [{'title': 'test', 'description': 'test', 'state': 'todo'}]
+            * 2
+        },
+    )
+
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert resp.json() == {'detail': 'at most 1 items per request'}
+
+
+@pytest.mark.asyncio
+async def test_bulk_patch_todos(session, client, user, other_user, token):
+    todos = TodoFactory.create_batch(2, user_id=user.id, state=TodoState.todo)
+    foreign = TodoFactory(user_id=other_user.id)
+    session.add_all([*todos, foreign])
+    await session.commit()
+
+    resp = client.patch(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'todos': [
+                {'id': todos[0].id, 'state': 'done'},
+                {'id': todos[1].id, 'title': 'renamed'},
+                {'id': foreign.id, 'title': 'hijacked'},
+            ]
+        },
+    )
+    results = resp.json()['results']
+
+    assert resp.status_code == HTTPStatus.OK
+    assert [r['status'] for r in results] == ['updated', 'updated', 'not_found']
+    assert results[0]['todo']['state'] == 'done'
+    assert results[0]['todo']['title'] == todos[0].title
+    assert results[1]['todo']['title'] == 'renamed'
+    assert results[1]['todo']['state'] == 'todo'
+
+    await session.refresh(foreign)
+    assert foreign.title != 'hijacked'
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_todos(session, client, user, other_user, token):
+    todo = TodoFactory(user_id=user.id)
+    foreign = TodoFactory(user_id=other_user.id)
+    session.add_all([todo, foreign])
+    await session.commit()
+
+    resp = client.request(
+        'DELETE',
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ids': [todo.id, foreign.id]},
+    )
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.json() == {
+        'results': [
+            {'id': todo.id, 'status': 'deleted', 'todo': None},
+            {'id': foreign.id, 'status': 'not_found', 'todo': None},
+        ]
+    }
+    await session.refresh(todo)
+    assert todo.trashed_at is not None
+
+
+def test_create_todo_single_round_trip(client, token, sql_statements):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todos/', headers=headers)
+    sql_statements.clear()
+
+    client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'test', 'description': 'test', 'state': 'draft'},
+    )
+
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith('INSERT INTO todos')
+    assert 'RETURNING' in sql_statements[0]
+
+
+@pytest.mark.asyncio
+async def test_patch_todo_statements(
+    session, client, user, token, sql_statements
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todos/', headers=headers)
+    sql_statements.clear()
+
+    resp = client.patch(
+        f'/todos/{todo.id}', headers=headers, json={'title': 'test update'}
+    )
+
+    expected = 2
+    assert resp.json()['updated_at']
+    assert len(sql_statements) == expected
+    assert sql_statements[1].startswith('UPDATE todos')
+    assert 'RETURNING' in sql_statements[1]
+
+
+TODO = {'title': 'test', 'description': 'test', 'state': 'draft'}
+
+
+@pytest_asyncio.fixture
+async def todo_ids(session, user):
+    todos = TodoFactory.create_batch(5, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+
+    return [todo.id for todo in todos]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_lists_share_one_query(
+    async_client, token, todo_ids, sql_statements
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    await async_client.get('/todos/?limit=1', headers=headers)
+    shared = todo_list_flights.shared.value
+    sql_statements.clear()
+
+    responses = await asyncio.gather(
+        *(async_client.get('/todos/', headers=headers) for _ in range(100))
+    )
+
+    # the count for the ETag and the page, once
+    expected = 2
+    assert {resp.status_code for resp in responses} == {HTTPStatus.OK}
+    assert len({resp.text for resp in responses}) == 1
+    assert len(sql_statements) == expected
+    assert todo_list_flights.shared.value > shared
+
+
+@pytest.mark.parametrize(
+    'case',
+    [
+        ('GET', '/todos/', None, 2),
+        ('GET', '/todos/?q=test', None, 2),
+        ('GET', '/todos/{id}', None, 1),
+        ('POST', '/todos/', lambda ids: TODO, 1),
+        ('PATCH', '/todos/{id}', lambda ids: {'title': 'test update'}, 2),
+        ('DELETE', '/todos/{id}', None, 2),
+        ('POST', '/todos/bulk', lambda ids: {'todos': [TODO] * 10}, 1),
+        (
+            'PATCH',
+            '/todos/bulk',
+            lambda ids: {'todos': [{'id': id, 'title': 't'} for id in ids]},
+            3,
+        ),
+        ('DELETE', '/todos/bulk', lambda ids: {'ids': ids}, 1),
+    ],
+    ids=lambda case: f'{case[0]} {case[1]}',
+)
+def test_todo_query_budgets(client, token, todo_ids, query_budget, case):
+    method, path, body, max_queries = case
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todos/', headers=headers)
+
+    with query_budget(max_queries):
+        resp = client.request(
+            method,
+            path.format(id=todo_ids[0]),
+            headers=headers,
+            json=body(todo_ids) if body else None,
+        )
+
+    assert resp.is_success
+
+
+@pytest.mark.asyncio
+async def test_get_todo_not_modified(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get(f'/todos/{todo.id}', headers=headers)
+    etag = first.headers['ETag']
+    second = client.get(
+        f'/todos/{todo.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert second.status_code == HTTPStatus.NOT_MODIFIED
+    assert second.headers['ETag'] == etag
+    assert not second.content
+
+
+@pytest.mark.asyncio
+async def test_get_todo_etag_changes_on_patch(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get(f'/todos/{todo.id}', headers=headers).headers['ETag']
+
+    patched = client.patch(
+        f'/todos/{todo.id}', headers=headers, json={'title': 'new'}
+    )
+    resp = client.get(
+        f'/todos/{todo.id}', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers['ETag'] != etag
+    assert resp.headers['ETag'] == patched.headers['ETag']
+
+
+def test_list_todos_not_modified(client, token, todo_ids, query_budget):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    with query_budget(1):
+        resp = client.get('/todos/', headers={**headers, 'If-None-Match': etag})
+
+    assert resp.status_code == HTTPStatus.NOT_MODIFIED
+    assert resp.headers['ETag'] == etag
+
+
+def test_list_todos_etag_tracks_data_and_filter(client, token, todo_ids):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    other_page = client.get('/todos/?limit=2', headers=headers)
+    client.delete(f'/todos/{todo_ids[-1]}', headers=headers)
+    after_delete = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert other_page.headers['ETag'] != etag
+    assert after_delete.status_code == HTTPStatus.OK
+    assert after_delete.headers['ETag'] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_todos_etag_tracks_write_committed_late(
+    session, client, user, token, todo_ids
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    # stamped by a transaction that started before the latest write: the
+    # row count and the newest updated_at stay the same
+    await session.execute(
+        update(Todo)
+        .where(Todo.id == todo_ids[0])
+        .values(title='late', updated_at=Todo.updated_at - timedelta(1))
+    )
+    await session.commit()
+    await todo_list_cache.invalidate(user.id)
+    resp = client.get('/todos/', headers={**headers, 'If-None-Match': etag})
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers['ETag'] != etag
+
+
+def test_patch_todo_if_match(client, token, todo_ids):
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f'/todos/{todo_ids[0]}'
+    etag = client.get(url, headers=headers).headers['ETag']
+
+    first = client.patch(
+        url, headers={**headers, 'If-Match': etag}, json={'title': 'a'}
+    )
+    stale = client.patch(
+        url, headers={**headers, 'If-Match': etag}, json={'title': 'b'}
+    )
+
+    assert first.status_code == HTTPStatus.OK
+    assert stale.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert stale.json() == {'detail': 'precondition failed'}
+    assert client.get(url, headers=headers).json()['title'] == 'a'
+
+
+def test_delete_todo_if_match(client, token, todo_ids):
+    headers = {'Authorization': f'Bearer {token}'}
+    url = f'/todos/{todo_ids[0]}'
+    etag = client.get(url, headers=headers).headers['ETag']
+
+    stale = client.delete(url, headers={**headers, 'If-Match': '"stale"'})
+    resp = client.delete(url, headers={**headers, 'If-Match': etag})
+
+    assert stale.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert resp.status_code == HTTPStatus.OK
+
+
+def test_list_todos_served_from_cache(client, token, todo_ids, query_budget):
+    headers = {'Authorization': f'Bearer {token}'}
+    first = client.get('/todos/', headers=headers)
+
+    with query_budget(0):
+        second = client.get('/todos/', headers=headers)
+        not_modified = client.get(
+            '/todos/',
+            headers={**headers, 'If-None-Match': first.headers['ETag']},
+        )
+
+    assert second.json() == first.json()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.parametrize(
+    'case',
+    [
+        ('POST', '/todos/', lambda ids: TODO),
+        ('PATCH', '/todos/{id}', lambda ids: {'title': 'changed'}),
+        ('DELETE', '/todos/{id}', None),
+        ('POST', '/todos/bulk', lambda ids: {'todos': [TODO]}),
+        ('DELETE', '/todos/bulk', lambda ids: {'ids': ids[:1]}),
+    ],
+    ids=lambda case: f'{case[0]} {case[1]}',
+)
+def test_list_cache_invalidated_by_writes(client, token, todo_ids, case):
+    method, path, body = case
+    headers = {'Authorization': f'Bearer {token}'}
+    before = client.get('/todos/', headers=headers).json()
+
+    client.request(
+        method,
+        path.format(id=todo_ids[0]),
+        headers=headers,
+        json=body(todo_ids) if body else None,
+    )
+    after = client.get('/todos/', headers=headers).json()
+
+    assert after != before
+
+
+def test_list_cache_keyed_by_filter(client, token, todo_ids, list_cache):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.get('/todos/', headers=headers)
+    page = client.get('/todos/?limit=2', headers=headers)
+
+    expected = 2
+    assert len(page.json()['todos']) == expected
+    assert len(list_cache) == expected
+
+
+def test_list_cache_with_shared_backend(client, token, todo_ids, monkeypatch):
+    monkeypatch.setattr(todo_list_cache, 'backend', PickleCache())
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first = client.get('/todos/', headers=headers)
+    cached = client.get('/todos/', headers=headers)
+    client.delete(f'/todos/{todo_ids[0]}', headers=headers)
+    after = client.get('/todos/', headers=headers)
+
+    assert cached.json() == first.json()
+    assert len(after.json()['todos']) == len(first.json()['todos']) - 1
+
+
+def test_list_cache_metrics(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    hits, misses = LOOKUPS.labels('hit'), LOOKUPS.labels('miss')
+    hit_count, miss_count = hits.value, misses.value
+
+    client.get('/todos/', headers=headers)
+    client.get('/todos/', headers=headers)
+
+    assert misses.value == miss_count + 1
+    assert hits.value == hit_count + 1
+
+
+@pytest.mark.asyncio
+async def test_todo_reads_skip_identity_map(session, client, user, token):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    session.expunge_all()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    one = client.get(f'/todos/{todo.id}', headers=headers)
+    many = client.get('/todos/', headers=headers)
+
+    assert one.json() == many.json()['todos'][0]
+    assert not session.identity_map
+
+
+def test_export_todos_ndjson(client, token, todo_ids):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.get('/todos/export', headers=headers)
+    listed = client.get('/todos/', headers=headers).json()['todos']
+
+    assert resp.status_code == HTTPStatus.OK
+    assert resp.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in resp.text.splitlines()] == listed
+
+
+def test_export_todos_csv(client, token, todo_ids):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    resp = client.get('/todos/export?format=csv', headers=headers)
+    listed = client.get('/todos/', headers=headers).json()['todos']
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+
+    assert resp.headers['content-type'].startswith('text/csv')
+    assert [int(row['id']) for row in rows] == [todo['id'] for todo in listed]
+    assert rows[0]['state'] == listed[0]['state']
+    assert rows[0]['created_at'] == listed[0]['created_at']
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_export_todos_streams_in_constant_memory(
+    session, client, user, token
+):
+    todos = 100_000
+    await session.execute(
+        text("""
+            INSERT INTO todos (title, description, state, user_id)
+            SELECT 'todo ' || g, 'description ' || g, 'todo', :user_id
+            FROM generate_series(1, :todos) AS g
+        """),
+        {'user_id': user.id, 'todos': todos},
+    )
+    await session.commit()
+
+    result = await call_app('GET', '/todos/export', token)
+
+    bound = 8 * 1024 * 1024
+    assert result['chunks'] > todos // EXPORT_BATCH_SIZE
+    assert result['bytes'] > bound
+    assert result['rss_growth'] < bound
+
+
+def test_import_todos_ndjson(client, token):
+    body = '\n'.join([
+        json.dumps({'title': 'a', 'description': 'a', 'state': 'todo'}),
+        '',
+        '{"title": "b", "description": "b", "state": "unknown"}',
+        'not json',
+        json.dumps({'title': 'c', 'description': 'c', 'state': 'done'}),
+    ])
+
+    resp = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        content=body,
+    )
+    listed = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    ).json()['todos']
+
+    report = resp.json()
+    assert resp.status_code == HTTPStatus.OK
+    assert (report['accepted'], report['rejected']) == (2, 2)
+    assert [error['line'] for error in report['errors']] == [3, 4]
+    assert report['errors'][0]['error'].startswith('state: ')
+    assert [(todo['title'], todo['state']) for todo in listed] == [
+        ('a', 'todo'),
+        ('c', 'done'),
+    ]
+
+
+def test_import_todos_csv_round_trips_export(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'a, b', 'description': 'two\r\nlines', 'state': 'doing'},
+    )
+    exported = client.get('/todos/export?format=csv', headers=headers).text
+
+    resp = client.post(
+        '/todos/import?format=csv',
+        headers=headers,
+        content=(chunk.encode() for chunk in exported),
+    )
+    todos = client.get('/todos/', headers=headers).json()['todos']
+
+    assert resp.json() == {'accepted': 1, 'rejected': 0, 'errors': []}
+    assert todos[0] | {'id': 0, 'created_at': 0, 'updated_at': 0} == (
+        todos[1] | {'id': 0, 'created_at': 0, 'updated_at': 0}
+    )
+
+
+def test_import_todos_caps_reported_errors(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_IMPORT_MAX_ERRORS', 1)
+
+    resp = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        content='{}\n{}\n{}\n',
+    )
+
+    assert resp.json() == {
+        'accepted': 0,
+        'rejected': 3,
+        'errors': [
+            {
+                'line': 1,
+                'error': 'title: Field required; '
+                'description: Field required; state: Field required',
+            }
+        ],
+    }
+
+
+def test_import_todos_rejects_long_lines(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_IMPORT_MAX_LINE_LENGTH', 10)
+
+    resp = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        content='x' * 100,
+    )
+
+    assert resp.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert resp.json() == {'detail': 'line 1 is too long'}
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_import_todos_streams_in_constant_memory(session, user, token):
+    todos = 100_000
+    line = json.dumps({'title': 'x' * 200, 'description': 'y', 'state': 'todo'})
+    body = (f'{line}\n'.encode() * 100 for _ in range(todos // 100))
+
+    result = await call_app('POST', '/todos/import', token, body)
+    count = await session.scalar(
+        select(func.count()).select_from(Todo).where(Todo.user_id == user.id)
+    )
+
+    bound = 8 * 1024 * 1024
+    assert result['status'] == HTTPStatus.OK
+    assert count == todos
+    assert len(line) * todos > bound
+    assert result['rss_growth'] < bound
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from fastzero.list_cache import todo_list_cache
+from fastzero.models import Todo, TodoState
+from fastzero.trash import TrashPurger
+
+
+def make_todos(user, count):
+    return [
+        Todo(title='t', description='d', state=TodoState.todo, user_id=user.id)
+        for _ in range(count)
+    ]
+
+
+async def trash(session, todos):
+    session.add_all(todos)
+    await session.commit()
+    await session.execute(
+        update(Todo)
+        .where(Todo.id.in_([todo.id for todo in todos]))
+        .values(state=TodoState.trash, trashed_at=Todo.created_at)
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_purge_batch_deletes_expired_trash(engine, session, user):
+    [live] = make_todos(user, 1)
+    session.add(live)
+    await trash(session, make_todos(user, 3))
+    generation = await todo_list_cache.generation(user.id)
+
+    purger = TrashPurger(engine, timedelta(0), 2, rate=1000, interval=60)
+
+    expected = 2
+    assert await purger.purge_batch() == expected
+    assert await purger.purge_batch() == 1
+    assert await purger.purge_batch() == 0
+    assert (await session.scalars(select(Todo.id))).all() == [live.id]
+    assert await todo_list_cache.generation(user.id) != generation
+
+
+@pytest.mark.asyncio
+async def test_purge_batch_keeps_recent_trash(engine, session, user):
+    await trash(session, make_todos(user, 1))
+
+    purger = TrashPurger(engine, timedelta(days=1), 10, rate=1000, interval=60)
+
+    assert await purger.purge_batch() == 0
+
+
+@pytest.mark.asyncio
+async def test_purger_runs_in_background(engine, session, user):
+    await trash(session, make_todos(user, 5))
+
+    purger = TrashPurger(engine, timedelta(0), 2, rate=1000, interval=60)
+    purger.start()
+    for _ in range(100):
+        if not (await session.scalars(select(Todo.id))).all():
+            break
+        await asyncio.sleep(0.01)
+    await purger.stop()
+
+    assert not (await session.scalars(select(Todo.id))).all()
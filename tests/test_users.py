@@ -1,6 +1,13 @@
+import asyncio
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import func, select, text
+
+from fastzero.models import Todo
 from fastzero.schemas import UserPublic
+from fastzero.singleflight import user_flights
+from tests.asgi import call_app
 
 
 def test_create_user(client):
@@ -48,7 +55,7 @@ def test_create_user_email_exists(client, user):
 
 
 def test_read_users(client):
-    expected = {'users': []}
+    expected = {'users': [], 'next_cursor': None}
     resp = client.get('/users/')
     assert resp.status_code == HTTPStatus.OK
     assert resp.json() == expected
@@ -56,12 +63,27 @@ def test_read_users(client):
 
 def test_read_users_with_users(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
-    expected = {'users': [user_schema]}
+    expected = {'users': [user_schema], 'next_cursor': None}
     resp = client.get('/users/')
     assert resp.status_code == HTTPStatus.OK
     assert resp.json() == expected
 
 
+def test_read_users_cursor(client, user, other_user):
+    first = client.get('/users/?limit=1').json()
+    second = client.get(f'/users/?limit=1&cursor={first["next_cursor"]}')
+
+    assert [u['id'] for u in first['users']] == [user.id]
+    assert [u['id'] for u in second.json()['users']] == [other_user.id]
+
+
+def test_read_users_invalid_cursor(client):
+    resp = client.get('/users/?cursor=invalid')
+
+    assert resp.status_code == HTTPStatus.BAD_REQUEST
+    assert resp.json() == {'detail': 'invalid cursor'}
+
+
 def test_read_user(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     resp = client.get('/users/1')
@@ -144,3 +166,90 @@ def test_delete_user_with_wrong_user(client, other_user, token):
     expected = {'detail': 'not enough permissions'}
     assert resp.status_code == HTTPStatus.FORBIDDEN
     assert resp.json() == expected
+
+
+def test_create_user_statements(client, sql_statements):
+    client.post(
+        '/users/',
+        json={'username': 'test', 'email': 'test@test.com', 'password': 'x'},
+    )
+
+    expected = 2
+    assert len(sql_statements) == expected
+    assert sql_statements[1].startswith('INSERT INTO users')
+    assert 'RETURNING' in sql_statements[1]
+
+
+def test_update_user_single_round_trip(
+    client, cached_user, token, sql_statements
+):
+    client.put(
+        f'/users/{cached_user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'bob', 'email': 'bob@test.com', 'password': 'x'},
+    )
+
+    assert len(sql_statements) == 1
+    assert sql_statements[0].startswith('UPDATE users')
+    assert 'RETURNING' in sql_statements[0]
+
+
+@pytest.mark.parametrize('path', ['/users/', '/users/{id}'])
+def test_read_users_select_public_columns(client, user, sql_statements, path):
+    resp = client.get(path.format(id=user.id))
+
+    assert resp.status_code == HTTPStatus.OK
+    assert len(sql_statements) == 1
+    assert 'users.password' not in sql_statements[0]
+    assert 'users.token_version' not in sql_statements[0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_user_reads_share_one_query(
+    async_client, user, sql_statements
+):
+    shared = user_flights.shared.value
+
+    responses = await asyncio.gather(
+        *(async_client.get(f'/users/{user.id}') for _ in range(100))
+    )
+
+    assert {resp.status_code for resp in responses} == {HTTPStatus.OK}
+    assert len({resp.text for resp in responses}) == 1
+    assert len(sql_statements) == 1
+    assert user_flights.shared.value > shared
+
+
+def test_read_user_after_update_is_fresh(client, user, token):
+    client.get(f'/users/{user.id}')
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'new', 'email': 'new@test.com', 'password': 'x'},
+    )
+
+    assert client.get(f'/users/{user.id}').json()['username'] == 'new'
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_delete_user_with_many_todos_in_bounded_memory(
+    session, user, token
+):
+    todos = 100_000
+    await session.execute(
+        text("""
+            INSERT INTO todos (title, description, state, user_id)
+            SELECT 'todo ' || g, 'description ' || g, 'todo', :user_id
+            FROM generate_series(1, :todos) AS g
+        """),
+        {'user_id': user.id, 'todos': todos},
+    )
+    await session.commit()
+
+    result = await call_app('DELETE', f'/users/{user.id}', token)
+    remaining = await session.scalar(select(func.count()).select_from(Todo))
+
+    assert result['status'] == HTTPStatus.OK
+    assert remaining == 0
+    assert result['rss_growth'] < 8 * 1024 * 1024